@@ -0,0 +1,20 @@
+"""Index auth_codes.code for the code-only login lookup.
+
+Revision ID: auth_codes_code_index
+Revises: comments_listing_index
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "auth_codes_code_index"
+down_revision = "comments_listing_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_auth_codes_code"), "auth_codes", ["code"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_auth_codes_code"), table_name="auth_codes")
@@ -0,0 +1,28 @@
+"""Add composite index for the comments listing query.
+
+Revision ID: comments_listing_index
+Revises: add_levels_achievements
+Create Date: 2026-08-31
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "comments_listing_index"
+down_revision = "add_levels_achievements"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Covers list_post_comments: filter on (post_id, is_approved),
+    # order by created_at DESC
+    op.create_index(
+        "ix_comments_post_approved_created",
+        "comments",
+        ["post_id", "is_approved", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comments_post_approved_created", table_name="comments")
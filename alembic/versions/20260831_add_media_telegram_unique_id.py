@@ -0,0 +1,27 @@
+"""Add media.telegram_unique_id for re-upload deduplication.
+
+Revision ID: media_tg_unique_id
+Revises: auth_codes_code_index
+Create Date: 2026-08-31
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "media_tg_unique_id"
+down_revision = "auth_codes_code_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "media", sa.Column("telegram_unique_id", sa.String(length=100), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_media_telegram_unique_id"), "media", ["telegram_unique_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_media_telegram_unique_id"), table_name="media")
+    op.drop_column("media", "telegram_unique_id")
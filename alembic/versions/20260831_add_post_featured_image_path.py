@@ -0,0 +1,36 @@
+"""Add posts.featured_image_path denormalized cover path.
+
+Revision ID: post_featured_path
+Revises: media_tg_unique_id
+Create Date: 2026-08-31
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "post_featured_path"
+down_revision = "media_tg_unique_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts", sa.Column("featured_image_path", sa.String(length=500), nullable=True)
+    )
+    # Backfill: cover image path, else first attached image by sort order
+    op.execute(
+        """
+        UPDATE posts p
+        SET featured_image_path = COALESCE(
+            (SELECT m.file_path FROM media m WHERE m.id = p.cover_image_id),
+            (SELECT m.file_path FROM media m
+             WHERE m.post_id = p.id AND m.media_type = 'IMAGE'
+             ORDER BY m.sort_order, m.created_at
+             LIMIT 1)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "featured_image_path")
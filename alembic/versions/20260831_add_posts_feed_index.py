@@ -0,0 +1,33 @@
+"""Replace ix_posts_visibility_status with a covering feed index.
+
+Revision ID: posts_feed_index
+Revises: post_featured_path
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "posts_feed_index"
+down_revision = "post_featured_path"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_posts_visibility_status", table_name="posts")
+    op.create_index(
+        "ix_posts_feed",
+        "posts",
+        ["status", "visibility", "is_pinned", "published_at"],
+        unique=False,
+        postgresql_include=["id", "title", "slug", "excerpt", "featured_image_path"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_feed", table_name="posts")
+    op.create_index(
+        "ix_posts_visibility_status",
+        "posts",
+        ["visibility", "status", "published_at"],
+        unique=False,
+    )
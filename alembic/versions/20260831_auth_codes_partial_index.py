@@ -0,0 +1,29 @@
+"""Replace the auth_codes.code index with a partial index on live codes.
+
+Revision ID: auth_codes_partial
+Revises: enum_cols_varchar
+Create Date: 2026-08-31
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "auth_codes_partial"
+down_revision = "enum_cols_varchar"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f("ix_auth_codes_code"), table_name="auth_codes")
+    op.create_index(
+        "ix_auth_codes_active",
+        "auth_codes",
+        ["code"],
+        unique=False,
+        postgresql_where=text("used = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_auth_codes_active", table_name="auth_codes")
+    op.create_index(op.f("ix_auth_codes_code"), "auth_codes", ["code"], unique=False)
@@ -0,0 +1,27 @@
+"""Add a partial index for the comment moderation queue.
+
+Revision ID: comments_pending_idx
+Revises: auth_codes_partial
+Create Date: 2026-08-31
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "comments_pending_idx"
+down_revision = "auth_codes_partial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_comments_pending",
+        "comments",
+        [text("created_at DESC")],
+        unique=False,
+        postgresql_where=text("is_approved = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comments_pending", table_name="comments")
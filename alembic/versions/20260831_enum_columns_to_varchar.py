@@ -0,0 +1,66 @@
+"""Convert Postgres enum columns to VARCHAR(16) + CHECK constraints.
+
+Revision ID: enum_cols_varchar
+Revises: posts_feed_index
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "enum_cols_varchar"
+down_revision = "posts_feed_index"
+branch_labels = None
+depends_on = None
+
+# (table, column, type/constraint name, allowed values)
+_ENUM_COLUMNS = [
+    ("users", "access_level", "access_level",
+     ["PUBLIC", "REGISTERED", "PREMIUM_1", "PREMIUM_2"]),
+    ("posts", "visibility", "post_visibility",
+     ["PUBLIC", "REGISTERED", "PREMIUM_1", "PREMIUM_2"]),
+    ("posts", "status", "post_status",
+     ["DRAFT", "PUBLISHED", "ARCHIVED"]),
+    ("posts", "post_type", "post_type",
+     ["ARTICLE", "PHOTO", "WORK"]),
+    ("media", "media_type", "media_type",
+     ["IMAGE", "AUDIO", "VIDEO", "DOCUMENT"]),
+]
+
+
+def _values_sql(values: list[str]) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def upgrade() -> None:
+    # posts.post_type carries a server default of the enum type
+    op.execute("ALTER TABLE posts ALTER COLUMN post_type DROP DEFAULT")
+
+    for table, column, name, values in _ENUM_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE VARCHAR(16) USING {column}::text"
+        )
+        # Same names SQLAlchemy generates for the model-side constraints
+        op.create_check_constraint(
+            f"ck_{table}_{name}", table, f"{column} IN ({_values_sql(values)})"
+        )
+
+    op.execute("ALTER TABLE posts ALTER COLUMN post_type SET DEFAULT 'ARTICLE'")
+
+    for type_name in ("access_level", "post_visibility", "post_status",
+                      "post_type", "media_type"):
+        op.execute(f"DROP TYPE IF EXISTS {type_name}")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE posts ALTER COLUMN post_type DROP DEFAULT")
+
+    for table, column, name, values in _ENUM_COLUMNS:
+        op.drop_constraint(f"ck_{table}_{name}", table, type_="check")
+        op.execute(f"CREATE TYPE {name}_tmp AS ENUM ({_values_sql(values)})")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE {name}_tmp USING {column}::{name}_tmp"
+        )
+        op.execute(f"ALTER TYPE {name}_tmp RENAME TO {name}")
+
+    op.execute("ALTER TABLE posts ALTER COLUMN post_type SET DEFAULT 'ARTICLE'")
@@ -0,0 +1,41 @@
+"""Make posts.search_vector a generated column.
+
+Revision ID: search_vector_generated
+Revises: comments_pending_idx
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "search_vector_generated"
+down_revision = "comments_pending_idx"
+branch_labels = None
+depends_on = None
+
+_EXPR = (
+    "to_tsvector('english', coalesce(title, '') || ' ' "
+    "|| coalesce(content_md, ''))"
+)
+
+
+def upgrade() -> None:
+    # Dropping the column also drops the GIN index; recreate both.
+    # GENERATED ... STORED backfills existing rows on ADD COLUMN.
+    op.execute("DROP INDEX IF EXISTS ix_posts_search_vector")
+    op.execute("ALTER TABLE posts DROP COLUMN search_vector")
+    op.execute(
+        f"ALTER TABLE posts ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({_EXPR}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_posts_search_vector")
+    op.execute("ALTER TABLE posts DROP COLUMN search_vector")
+    op.execute("ALTER TABLE posts ADD COLUMN search_vector tsvector")
+    op.execute(f"UPDATE posts SET search_vector = {_EXPR}")
+    op.execute(
+        "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)"
+    )
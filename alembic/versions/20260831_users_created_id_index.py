@@ -0,0 +1,20 @@
+"""Composite index for keyset pagination over users.
+
+Revision ID: users_created_id_idx
+Revises: search_vector_generated
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "users_created_id_idx"
+down_revision = "search_vector_generated"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_id", "users", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_id", table_name="users")
@@ -0,0 +1,31 @@
+"""Trigram indexes for the admin user search.
+
+Revision ID: users_trgm_idx
+Revises: users_created_id_idx
+Create Date: 2026-08-31
+"""
+from alembic import op
+
+revision = "users_trgm_idx"
+down_revision = "users_created_id_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Leading-wildcard ILIKE can't use a btree; pg_trgm GIN indexes
+    # accelerate it transparently without changing the query
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_users_username_trgm "
+        "ON users USING gin (username gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_users_display_name_trgm "
+        "ON users USING gin (display_name gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_users_display_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
@@ -5,29 +5,32 @@ import sys
 
 sys.path.insert(0, "/app")
 
-from sqlalchemy import select, update
+from sqlalchemy import update
 from src.db.session import async_session_maker
 from src.db.models.user import User
+from src.services.admin_cache import update_admin_cache
 
 
 async def make_admin(telegram_id: int):
     async with async_session_maker() as db:
-        # Check if user exists
+        # Single UPDATE ... RETURNING instead of SELECT + mutate + commit
         result = await db.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            update(User)
+            .where(User.telegram_id == telegram_id)
+            .values(is_admin=True)
+            .returning(User.display_name)
         )
-        user = result.scalar_one_or_none()
+        row = result.first()
 
-        if not user:
+        if not row:
             print(f"User with telegram_id {telegram_id} not found.")
             print("The user needs to start the bot first with /start")
             return
 
-        # Make admin
-        user.is_admin = True
         await db.commit()
+        await update_admin_cache(telegram_id, True)
 
-        print(f"User {user.display_name} (telegram_id: {telegram_id}) is now an admin!")
+        print(f"User {row.display_name} (telegram_id: {telegram_id}) is now an admin!")
 
 
 if __name__ == "__main__":
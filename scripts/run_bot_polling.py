@@ -7,6 +7,14 @@ import sys
 
 sys.path.insert(0, "/app")
 
+# uvloop roughly halves event-loop overhead per await; the bot is pure
+# I/O (DB + Telegram), so every handler benefits. Optional: not
+# available on all platforms.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,30 +28,36 @@ async def main():
     # Import and configure bot
     from aiogram import Bot, Dispatcher
     from aiogram.client.default import DefaultBotProperties
-    from aiogram.client.session.aiohttp import AiohttpSession
-    from aiogram.client.telegram import TelegramAPIServer
     from aiogram.enums import ParseMode
-    from aiogram.fsm.storage.redis import RedisStorage
 
-    # Create session for local API server if configured
-    session = None
+    from src.bot.instance import create_bot_session
+    from src.bot.storage import HashRedisStorage
+    from src.bot.throttling import RateLimitMiddleware
+
     if settings.telegram_api_server:
-        api = TelegramAPIServer.from_base(settings.telegram_api_server, is_local=True)
-        session = AiohttpSession(api=api)
         print(f"Using local Telegram API server: {settings.telegram_api_server}")
 
     bot = Bot(
         token=settings.telegram_bot_token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-        session=session,
+        session=create_bot_session(),
     )
+    # Keep outbound sends under Telegram's 30/s global and per-chat
+    # limits (same middleware the webhook bot instance registers)
+    bot.session.middleware(RateLimitMiddleware())
 
     # Use Redis storage for FSM to persist state across restarts
-    # Set TTL to 1 hour so users have time to write long posts
-    storage = RedisStorage.from_url(
+    # Set TTL to 1 hour so users have time to write long posts.
+    # orjson (de)serialization instead of stdlib json — FSM data is
+    # touched on every post-creation step.
+    import orjson
+
+    storage = HashRedisStorage.from_url(
         settings.redis_url,
         state_ttl=3600,  # 1 hour
         data_ttl=3600,   # 1 hour
+        json_loads=orjson.loads,
+        json_dumps=lambda obj: orjson.dumps(obj).decode(),
     )
     dp = Dispatcher(storage=storage)
 
@@ -55,23 +69,25 @@ async def main():
 
     logger = logging.getLogger(__name__)
 
-    # Debug middleware to log all updates
-    @dp.update.outer_middleware()
-    async def debug_middleware(handler, event: Update, data):
-        state = data.get("state")
-        current_state = await state.get_state() if state else None
-        user_id = None
-        content_type = None
-
-        if event.message:
-            user_id = event.message.from_user.id
-            content_type = event.message.content_type
-        elif event.callback_query:
-            user_id = event.callback_query.from_user.id
-            content_type = "callback_query"
-
-        logger.info(f"UPDATE: user={user_id}, type={content_type}, state={current_state}")
-        return await handler(event, data)
+    # Debug middleware to log all updates. Only registered in debug mode:
+    # state.get_state() is a Redis round-trip per update, purely for the log line.
+    if settings.debug:
+        @dp.update.outer_middleware()
+        async def debug_middleware(handler, event: Update, data):
+            state = data.get("state")
+            current_state = await state.get_state() if state else None
+            user_id = None
+            content_type = None
+
+            if event.message:
+                user_id = event.message.from_user.id
+                content_type = event.message.content_type
+            elif event.callback_query:
+                user_id = event.callback_query.from_user.id
+                content_type = "callback_query"
+
+            logger.info(f"UPDATE: user={user_id}, type={content_type}, state={current_state}")
+            return await handler(event, data)
 
     main_router = Router()
     main_router.include_router(auth_router)
@@ -85,6 +101,16 @@ async def main():
 
     signal.signal(signal.SIGTERM, handle_signal)
 
+    # Seed the Redis admin set so admin-gated handlers skip Postgres
+    from src.db.session import get_db_context
+    from src.services.admin_cache import seed_admin_set
+
+    try:
+        async with get_db_context() as db:
+            await seed_admin_set(db)
+    except Exception as e:
+        logger.warning(f"Failed to seed admin cache: {e}")
+
     # Delete webhook first (required for polling)
     await bot.delete_webhook(drop_pending_updates=True)
 
@@ -92,10 +118,18 @@ async def main():
     print("Press Ctrl+C to stop")
 
     try:
-        await dp.start_polling(bot, polling_timeout=30)
+        # Max long-poll timeout plus an explicit update filter: Telegram
+        # holds the connection longer and only ships updates we handle
+        await dp.start_polling(
+            bot,
+            polling_timeout=50,
+            allowed_updates=["message", "callback_query"],
+        )
     finally:
         await bot.session.close()
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
@@ -0,0 +1,39 @@
+"""Shared FastAPI dependencies.
+
+Routers must import these instead of redefining their own copies: FastAPI
+caches dependency results per request by function object, so sharing one
+function means one auth lookup even when several dependencies need the user.
+"""
+
+from typing import Optional
+
+from fastapi import Cookie, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import get_db
+from src.services.auth import AuthService
+
+
+async def get_current_user_optional(
+    session: Optional[str] = Cookie(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get current user if logged in, None otherwise."""
+    if not session:
+        return None
+    auth_service = AuthService(db)
+    return await auth_service.get_user_by_session_token(session)
+
+
+async def get_current_user_required(
+    session: Optional[str] = Cookie(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Require authenticated user."""
+    if not session:
+        raise HTTPException(status_code=401, detail="Не авторизован")
+    auth_service = AuthService(db)
+    user = await auth_service.get_user_by_session_token(session)
+    if not user:
+        raise HTTPException(status_code=401, detail="Недействительная сессия")
+    return user
@@ -1,3 +1,4 @@
+import html
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, Response, Cookie
@@ -5,18 +6,40 @@ from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
 from src.db.session import get_db
-from src.db.models.user import AuthCode
 from src.services.auth import AuthService
 from src.bot.bot import send_auth_code
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+# Session cookie attributes, built once. The cookie name stays "session"
+# (a __Host- prefix would break plain-http local development).
+SESSION_COOKIE_KWARGS = {
+    "httponly": True,
+    "secure": not settings.debug,
+    "max_age": 30 * 24 * 60 * 60,  # 30 days
+    "samesite": "lax",
+}
+
+# Pre-built HTML for the hot htmx login path; the success template only
+# interpolates the (escaped) display name.
+_LOGIN_ERROR_HTML = """
+            <div class="p-4 bg-red-50 text-red-700 rounded-lg mb-4">
+                Неверный или просроченный код. Пожалуйста, получите новый код у бота.
+            </div>
+            <a href="/login" class="text-blue-500 hover:underline">Попробовать снова</a>
+            """
+
+_LOGIN_SUCCESS_TEMPLATE = """
+        <div class="p-4 bg-green-50 text-green-700 rounded-lg mb-4">
+            Добро пожаловать, {name}! Перенаправление...
+        </div>
+        """
+
 
 class RequestCodeRequest(BaseModel):
     telegram_id: int
@@ -98,14 +121,7 @@ async def verify_code(
     token = await auth_service.create_session(user.id)
 
     # Set cookie
-    response.set_cookie(
-        key="session",
-        value=token,
-        httponly=True,
-        secure=not settings.debug,
-        max_age=30 * 24 * 60 * 60,  # 30 days
-        samesite="lax",
-    )
+    response.set_cookie(key="session", value=token, **SESSION_COOKIE_KWARGS)
 
     return VerifyCodeResponse(
         success=True,
@@ -128,7 +144,8 @@ async def get_current_user(
     if not user:
         raise HTTPException(status_code=401, detail="Недействительная сессия")
 
-    return UserResponse(
+    # model_construct skips validation — the fields come straight from the DB
+    return UserResponse.model_construct(
         id=str(user.id),
         telegram_id=user.telegram_id,
         username=user.username,
@@ -165,38 +182,18 @@ async def verify_by_code_only(
     """Verify login code (finds telegram_id from code). Returns HTML for htmx."""
     from datetime import datetime, timezone
 
-    # Find the auth code and get telegram_id from it
-    # Normalize code to uppercase for case-insensitive comparison
-    normalized_code = code.strip().upper()
-    result = await db.execute(
-        select(AuthCode).where(
-            AuthCode.code == normalized_code,
-            AuthCode.expires_at > datetime.now(timezone.utc),
-            AuthCode.used == False,
-        )
-    )
-    auth_code = result.scalar_one_or_none()
-
-    if not auth_code:
-        return HTMLResponse(
-            content="""
-            <div class="p-4 bg-red-50 text-red-700 rounded-lg mb-4">
-                Неверный или просроченный код. Пожалуйста, получите новый код у бота.
-            </div>
-            <a href="/login" class="text-blue-500 hover:underline">Попробовать снова</a>
-            """,
-            status_code=200,
-        )
+    # Consume the auth code and get telegram_id from it (single-use)
+    auth_service = AuthService(db)
+    telegram_id = await auth_service.consume_auth_code(code)
 
-    # Mark code as used
-    auth_code.used = True
+    if telegram_id is None:
+        return HTMLResponse(content=_LOGIN_ERROR_HTML, status_code=200)
 
     # Get or create user
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_telegram_id(auth_code.telegram_id)
+    user = await auth_service.get_user_by_telegram_id(telegram_id)
 
     if not user:
-        user = await auth_service.create_user(auth_code.telegram_id)
+        user = await auth_service.create_user(telegram_id)
 
     # Update last login
     user.last_login = datetime.now(timezone.utc)
@@ -213,25 +210,15 @@ async def verify_by_code_only(
     # Create session
     token = await auth_service.create_session(user.id)
 
-    # Create response with HX-Redirect header for htmx
+    # Create response with HX-Redirect header for htmx.
+    # Escape display_name — it is user-controlled via Telegram.
     html_response = HTMLResponse(
-        content=f"""
-        <div class="p-4 bg-green-50 text-green-700 rounded-lg mb-4">
-            Добро пожаловать, {user.display_name}! Перенаправление...
-        </div>
-        """,
+        content=_LOGIN_SUCCESS_TEMPLATE.format(name=html.escape(user.display_name)),
         status_code=200,
     )
 
     # Set cookie
-    html_response.set_cookie(
-        key="session",
-        value=token,
-        httponly=True,
-        secure=not settings.debug,
-        max_age=30 * 24 * 60 * 60,  # 30 days
-        samesite="lax",
-    )
+    html_response.set_cookie(key="session", value=token, **SESSION_COOKIE_KWARGS)
 
     # Redirect to the original page or home
     # Only allow relative paths to prevent open redirect
@@ -1,15 +1,14 @@
 import logging
-from pathlib import Path
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Cookie, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.deps import get_current_user_optional, get_current_user_required
 from src.db.session import get_db
-from src.services.auth import AuthService
+from src.templating import templates
 from src.services.comment import CommentService
 from src.services.notification import notify_admin_new_comment, notify_comment_reply
 from src.services.level import LevelService, XP_COMMENT, XP_REPLY
@@ -19,39 +18,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-templates_path = Path(__file__).parent.parent.parent.parent / "templates"
-templates = Jinja2Templates(directory=templates_path)
-
-
-async def get_current_user_required(
-    session: Optional[str] = Cookie(None),
-    db: AsyncSession = Depends(get_db),
-):
-    """Require authenticated user."""
-    if not session:
-        raise HTTPException(status_code=401, detail="Не авторизован")
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_session_token(session)
-    if not user:
-        raise HTTPException(status_code=401, detail="Недействительная сессия")
-    return user
-
-
-async def get_current_user_optional(
-    session: Optional[str] = Cookie(None),
-    db: AsyncSession = Depends(get_db),
-):
-    """Get current user if logged in."""
-    if not session:
-        return None
-    auth_service = AuthService(db)
-    return await auth_service.get_user_by_session_token(session)
 
 
 @router.post("/{post_id}", response_class=HTMLResponse)
 async def create_comment(
     request: Request,
     post_id: UUID,
+    background_tasks: BackgroundTasks,
     content: str = Form(...),
     parent_id: Optional[UUID] = Form(None),
     user=Depends(get_current_user_required),
@@ -113,10 +86,11 @@ async def create_comment(
                 logger.info("Skipping notification: replying to own comment")
         else:
             logger.warning(f"Parent comment {parent_id} not found")
-    # Notify admin about new top-level comment (don't notify if admin wrote it)
+    # Notify admin about new top-level comment (don't notify if admin wrote it).
+    # Runs after the response — the Telegram RTT stays off the POST latency.
     elif not user.is_admin and post:
-        await notify_admin_new_comment(
-            db=db,
+        background_tasks.add_task(
+            notify_admin_new_comment,
             comment_author_name=user.display_name,
             post_title=post.title,
             post_slug=post.slug,
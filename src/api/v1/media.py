@@ -1,35 +1,18 @@
-from pathlib import Path
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, Cookie, Request
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.deps import get_current_user_required
 from src.db.session import get_db
-from src.services.auth import AuthService
+from src.templating import templates
 from src.services.media import MediaService
 from src.schemas.media import MediaUploadResponse, MediaListResponse, MediaSortRequest
 
 router = APIRouter()
 
-templates_path = Path(__file__).parent.parent.parent.parent / "templates"
-templates = Jinja2Templates(directory=templates_path)
-
-
-async def get_current_user_required(
-    session: Optional[str] = Cookie(None),
-    db: AsyncSession = Depends(get_db),
-):
-    """Require authenticated user."""
-    if not session:
-        raise HTTPException(status_code=401, detail="Не авторизован")
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_session_token(session)
-    if not user:
-        raise HTTPException(status_code=401, detail="Недействительная сессия")
-    return user
 
 
 @router.post("/upload", response_class=HTMLResponse)
@@ -83,15 +66,34 @@ async def get_media(
     if not media:
         raise HTTPException(status_code=404, detail="Медиа не найдено")
 
-    return MediaUploadResponse(
-        id=media.id,
-        filename=media.filename,
-        original_name=media.original_name,
-        media_type=media.media_type.value,
-        file_size=media.file_size,
-        mime_type=media.mime_type,
-        url=media_service.get_url(media),
-        created_at=media.created_at,
+    return MediaUploadResponse.from_media(media, url=media_service.get_url(media))
+
+
+@router.get("/{media_id}/file")
+async def serve_media_file(
+    media_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Serve the media file through the front-end proxy via X-Accel-Redirect.
+
+    The response carries no body: nginx picks up the header and streams
+    the file with sendfile(2), keeping byte-pumping out of the Python
+    workers. Requires:
+
+        location /protected/ { internal; alias /app/uploads/; }
+    """
+    media_service = MediaService(db)
+    media = await media_service.get_by_id(media_id)
+
+    if not media:
+        raise HTTPException(status_code=404, detail="Медиа не найдено")
+
+    return Response(
+        headers={
+            "X-Accel-Redirect": f"/protected/{media.file_path}",
+            "Content-Type": media.mime_type,
+        }
     )
 
 
@@ -117,16 +119,7 @@ async def attach_media_to_post(
     requester_id = media.uploader_id if user.is_admin else user.id
     media = await media_service.attach_to_post(media_id, post_id, requester_id)
 
-    return MediaUploadResponse(
-        id=media.id,
-        filename=media.filename,
-        original_name=media.original_name,
-        media_type=media.media_type.value,
-        file_size=media.file_size,
-        mime_type=media.mime_type,
-        url=media_service.get_url(media),
-        created_at=media.created_at,
-    )
+    return MediaUploadResponse.from_media(media, url=media_service.get_url(media))
 
 
 @router.delete("/{media_id}", response_class=HTMLResponse)
@@ -164,16 +157,7 @@ async def list_post_media(
 
     return MediaListResponse(
         items=[
-            MediaUploadResponse(
-                id=m.id,
-                filename=m.filename,
-                original_name=m.original_name,
-                media_type=m.media_type.value,
-                file_size=m.file_size,
-                mime_type=m.mime_type,
-                url=media_service.get_url(m),
-                created_at=m.created_at,
-            )
+            MediaUploadResponse.from_media(m, url=media_service.get_url(m))
             for m in media_list
         ],
         total=len(media_list),
@@ -192,9 +176,7 @@ async def reorder_post_media(
         raise HTTPException(status_code=403, detail="Требуется доступ администратора")
 
     media_service = MediaService(db)
-
-    for idx, media_id in enumerate(data.media_ids):
-        await media_service.update_sort_order(media_id, idx)
+    await media_service.bulk_update_sort_order(data.media_ids)
 
     return {"success": True, "message": "Порядок обновлён"}
 
@@ -1,11 +1,24 @@
+import orjson
 from aiogram import Dispatcher, Router
 from aiogram.enums import ParseMode
 
 from src.bot.instance import bot
+from src.bot.storage import HashRedisStorage
 from src.config import settings
 
+# Redis-backed FSM with orjson (de)serialization, same as the polling
+# script: state survives restarts and every update_data/get_data along
+# the post-creation flow skips stdlib json
+storage = HashRedisStorage.from_url(
+    settings.redis_url,
+    state_ttl=3600,
+    data_ttl=3600,
+    json_loads=orjson.loads,
+    json_dumps=lambda obj: orjson.dumps(obj).decode(),
+)
+
 # Create dispatcher
-dp = Dispatcher()
+dp = Dispatcher(storage=storage)
 
 # Create main router
 main_router = Router()
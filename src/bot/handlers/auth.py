@@ -1,12 +1,18 @@
+import asyncio
+
 from aiogram import Router, F
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.bot.middlewares import DbSessionMiddleware
 from src.db.session import get_db_context
 from src.services.auth import AuthService
 from src.services.user import UserService
+from src.services.admin_cache import is_admin_cached
+from src.services.user_cache import get_cached_user, peek_cached_user
 
 
 class NicknameChange(StatesGroup):
@@ -14,117 +20,163 @@ class NicknameChange(StatesGroup):
 
 router = Router()
 
+# One lazily-connected DB session per update (available as the `db`
+# handler argument) instead of a get_db_context block per handler
+router.message.middleware(DbSessionMiddleware())
+router.callback_query.middleware(DbSessionMiddleware())
+
+
+# Keyboards and static texts are immutable — build them once at import
+# time instead of re-validating the same Pydantic models on every update.
+
+_REPLY_ROW = [KeyboardButton(text="📋 Меню"), KeyboardButton(text="🔐 Войти на сайт")]
+_REPLY_KB_USER = ReplyKeyboardMarkup(keyboard=[_REPLY_ROW], resize_keyboard=True)
+_REPLY_KB_ADMIN = ReplyKeyboardMarkup(
+    keyboard=[_REPLY_ROW, [KeyboardButton(text="📝 Новый пост")]],
+    resize_keyboard=True,
+)
+
+_MENU_ROWS = [
+    [InlineKeyboardButton(text="⭐ Мой уровень", callback_data="menu_level")],
+    [InlineKeyboardButton(text="✏️ Сменить ник", callback_data="menu_nickname")],
+    [InlineKeyboardButton(text="🔐 Получить код входа", callback_data="menu_login")],
+]
+_MENU_USER = InlineKeyboardMarkup(inline_keyboard=_MENU_ROWS)
+_MENU_ADMIN = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="📝 Новый пост", callback_data="menu_newpost")],
+        *_MENU_ROWS,
+    ]
+)
+
+_BACK_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="◀️ Назад в меню", callback_data="menu_back")]]
+)
+_CANCEL_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="◀️ Отмена", callback_data="menu_back_clear")]]
+)
+
+_POST_TYPE_PROMPT = "📝 <b>Создание нового поста</b>\n\nВыберите тип поста:"
+_POST_TYPE_KEYBOARD_REPLY = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="📝 Текстовый пост", callback_data="post_type_text")],
+        [InlineKeyboardButton(text="📷 Фото/Видео пост", callback_data="post_type_photo")],
+        [InlineKeyboardButton(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")],
+    ]
+)
+_POST_TYPE_KEYBOARD_MENU = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="📝 Текстовый пост", callback_data="post_type_text")],
+        [InlineKeyboardButton(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")],
+        [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="menu_back_clear")],
+    ]
+)
+
+_HELP_TEXT = (
+    "📚 <b>Доступные команды:</b>\n\n"
+    "/start - Главное меню\n"
+    "/menu - Показать меню\n"
+    "/level - Мой уровень и XP\n"
+    "/login - Получить код для входа на сайт\n"
+    "/newpost - Создать новый пост (для админов)\n"
+    "/cancel - Отменить текущее действие\n"
+    "/help - Показать эту справку"
+)
+
+
+async def _ensure_user_and_code(user) -> str:
+    """Upsert the user and issue a login code concurrently.
+
+    The code only needs the telegram_id, so both steps are independent.
+    An AsyncSession can't run two statements at once — each task checks
+    out its own session from the pool, overlapping the two round-trips.
+    """
+
+    async def _upsert() -> None:
+        async with get_db_context() as db:
+            await AuthService(db).upsert_user(
+                telegram_id=user.id,
+                username=user.username,
+                display_name=user.full_name,
+            )
+
+    async def _code() -> str:
+        async with get_db_context() as db:
+            return await AuthService(db).create_auth_code(user.id)
+
+    _, code = await asyncio.gather(_upsert(), _code())
+    return code
+
 
 def get_reply_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
     """Persistent reply keyboard at the bottom of the screen."""
-    buttons = [
-        [KeyboardButton(text="📋 Меню"), KeyboardButton(text="🔐 Войти на сайт")],
-    ]
-    if is_admin:
-        buttons.append([KeyboardButton(text="📝 Новый пост")])
-    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
+    return _REPLY_KB_ADMIN if is_admin else _REPLY_KB_USER
 
 
 def get_main_menu_keyboard(is_admin: bool = False) -> InlineKeyboardMarkup:
     """Get main menu keyboard based on user role."""
-    buttons = [
-        [InlineKeyboardButton(text="⭐ Мой уровень", callback_data="menu_level")],
-        [InlineKeyboardButton(text="✏️ Сменить ник", callback_data="menu_nickname")],
-        [InlineKeyboardButton(text="🔐 Получить код входа", callback_data="menu_login")],
-    ]
-    if is_admin:
-        buttons.insert(0, [InlineKeyboardButton(text="📝 Новый пост", callback_data="menu_newpost")])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return _MENU_ADMIN if is_admin else _MENU_USER
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message):
+async def cmd_start(message: Message, db: AsyncSession):
     """Handle /start command."""
     user = message.from_user
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-
-        # Check if user exists
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
+    # Don't write what didn't change: if a fresh cached copy already
+    # matches the Telegram profile, skip the UPDATE entirely.
+    cached = peek_cached_user(user.id)
+    if (
+        cached is not None
+        and cached.username == user.username
+        and cached.display_name == user.full_name
+    ):
+        created = False
+        is_admin = cached.is_admin
+    else:
+        # Single upsert: creates the user or refreshes their Telegram info
+        db_user, created = await AuthService(db).upsert_user(
+            telegram_id=user.id,
+            username=user.username,
+            display_name=user.full_name,
+            refresh_info=True,
+        )
+        is_admin = db_user.is_admin
 
-        if existing_user:
-            await auth_service.update_user_info(
-                existing_user,
-                username=user.username,
-                display_name=user.full_name,
-            )
-            is_admin = existing_user.is_admin
-            await message.answer(
-                f"👋 С возвращением, <b>{user.full_name}</b>!",
-                reply_markup=get_reply_keyboard(is_admin),
-            )
-            await message.answer(
-                "📋 <b>Главное меню</b>",
-                reply_markup=get_main_menu_keyboard(is_admin),
-            )
-        else:
-            # Create new user
-            new_user = await auth_service.create_user(
-                telegram_id=user.id,
-                username=user.username,
-                display_name=user.full_name,
-            )
-            is_admin = new_user.is_admin if new_user else False
-            await message.answer(
-                f"🎉 Добро пожаловать, <b>{user.full_name}</b>!\n\n"
-                f"Ваш аккаунт создан.",
-                reply_markup=get_reply_keyboard(is_admin),
-            )
-            await message.answer(
-                "📋 <b>Главное меню</b>",
-                reply_markup=get_main_menu_keyboard(is_admin),
-            )
+    if created:
+        await message.answer(
+            f"🎉 Добро пожаловать, <b>{user.full_name}</b>!\n\n"
+            f"Ваш аккаунт создан.",
+            reply_markup=get_reply_keyboard(is_admin),
+        )
+    else:
+        await message.answer(
+            f"👋 С возвращением, <b>{user.full_name}</b>!",
+            reply_markup=get_reply_keyboard(is_admin),
+        )
+    await message.answer(
+        "📋 <b>Главное меню</b>",
+        reply_markup=get_main_menu_keyboard(is_admin),
+    )
 
 
 @router.message(Command("login"))
 async def cmd_login(message: Message):
     """Handle /login command - generate auth code."""
-    user = message.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-
-        # Check if user exists
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-
-        if not existing_user:
-            # Create user first
-            existing_user = await auth_service.create_user(
-                telegram_id=user.id,
-                username=user.username,
-                display_name=user.full_name,
-            )
-
-        # Generate auth code
-        code = await auth_service.create_auth_code(user.id)
+    code = await _ensure_user_and_code(message.from_user)
 
-        await message.answer(
-            f"🔐 <b>Ваш код для входа:</b>\n\n"
-            f"<code>{code}</code>\n\n"
-            f"Введите этот код на сайте для входа.\n"
-            f"Код действителен 5 минут."
-        )
+    await message.answer(
+        f"🔐 <b>Ваш код для входа:</b>\n\n"
+        f"<code>{code}</code>\n\n"
+        f"Введите этот код на сайте для входа.\n"
+        f"Код действителен 5 минут."
+    )
 
 
 @router.message(Command("help"))
 async def cmd_help(message: Message):
     """Handle /help command."""
-    await message.answer(
-        "📚 <b>Доступные команды:</b>\n\n"
-        "/start - Главное меню\n"
-        "/menu - Показать меню\n"
-        "/level - Мой уровень и XP\n"
-        "/login - Получить код для входа на сайт\n"
-        "/newpost - Создать новый пост (для админов)\n"
-        "/cancel - Отменить текущее действие\n"
-        "/help - Показать эту справку"
-    )
+    await message.answer(_HELP_TEXT)
 
 
 def _format_level_message(user_db) -> str:
@@ -168,32 +220,24 @@ def _format_level_message(user_db) -> str:
 
 
 @router.message(Command("level"))
-async def cmd_level(message: Message):
+async def cmd_level(message: Message, db: AsyncSession):
     """Show user's level, XP progress and rules."""
-    user = message.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        db_user = await auth_service.get_user_by_telegram_id(user.id)
+    db_user = await get_cached_user(db, message.from_user.id)
 
-        if not db_user:
-            await message.answer("❌ Вы ещё не зарегистрированы. Нажмите /start")
-            return
+    if not db_user:
+        await message.answer("❌ Вы ещё не зарегистрированы. Нажмите /start")
+        return
 
-        await message.answer(_format_level_message(db_user))
+    await message.answer(_format_level_message(db_user))
 
 
 # ============= REPLY KEYBOARD HANDLERS =============
 
 @router.message(F.text == "📋 Меню")
-async def reply_menu(message: Message):
+async def reply_menu(message: Message, db: AsyncSession):
     """Handle reply keyboard 'Menu' button."""
-    user = message.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-        is_admin = existing_user.is_admin if existing_user else False
+    existing_user = await get_cached_user(db, message.from_user.id)
+    is_admin = existing_user.is_admin if existing_user else False
 
     await message.answer(
         "📋 <b>Главное меню</b>",
@@ -204,68 +248,46 @@ async def reply_menu(message: Message):
 @router.message(F.text == "🔐 Войти на сайт")
 async def reply_login(message: Message):
     """Handle reply keyboard 'Login' button."""
-    user = message.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
+    code = await _ensure_user_and_code(message.from_user)
 
-        if not existing_user:
-            existing_user = await auth_service.create_user(
-                telegram_id=user.id,
-                username=user.username,
-                display_name=user.full_name,
-            )
-
-        code = await auth_service.create_auth_code(user.id)
-
-        await message.answer(
-            f"🔐 <b>Ваш код для входа:</b>\n\n"
-            f"<code>{code}</code>\n\n"
-            f"Введите этот код на сайте для входа.\n"
-            f"Код действителен 5 минут."
-        )
+    await message.answer(
+        f"🔐 <b>Ваш код для входа:</b>\n\n"
+        f"<code>{code}</code>\n\n"
+        f"Введите этот код на сайте для входа.\n"
+        f"Код действителен 5 минут."
+    )
 
 
 @router.message(F.text == "📝 Новый пост")
-async def reply_newpost(message: Message, state: FSMContext):
+async def reply_newpost(message: Message, state: FSMContext, db: AsyncSession):
     """Handle reply keyboard 'New post' button."""
     from src.bot.handlers.posts import PostCreation
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
 
     user = message.from_user
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        db_user = await auth_service.get_user_by_telegram_id(user.id)
-
-        if not db_user or not db_user.is_admin:
-            await message.answer("❌ Только администраторы могут создавать посты.")
-            return
+    # Redis rejects non-admins in one RTT; admins (and cache misses)
+    # need the user row anyway to seed author_db_id below
+    if await is_admin_cached(user.id) is False:
+        await message.answer("❌ Только администраторы могут создавать посты.")
+        return
 
-    builder = InlineKeyboardBuilder()
-    builder.button(text="📝 Текстовый пост", callback_data="post_type_text")
-    builder.button(text="📷 Фото/Видео пост", callback_data="post_type_photo")
-    builder.button(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")
-    builder.adjust(1)
+    db_user = await get_cached_user(db, user.id)
+    if not db_user or not db_user.is_admin:
+        await message.answer("❌ Только администраторы могут создавать посты.")
+        return
 
+    # Cache the author's DB id so media/publish handlers skip the
+    # per-update user lookup, same as /newpost
+    await state.update_data(author_db_id=str(db_user.id))
     await state.set_state(PostCreation.waiting_for_type)
-    await message.answer(
-        "📝 <b>Создание нового поста</b>\n\n"
-        "Выберите тип поста:",
-        reply_markup=builder.as_markup()
-    )
+    await message.answer(_POST_TYPE_PROMPT, reply_markup=_POST_TYPE_KEYBOARD_REPLY)
 
 
 @router.message(Command("menu"))
-async def cmd_menu(message: Message):
+async def cmd_menu(message: Message, db: AsyncSession):
     """Show main menu."""
-    user = message.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-        is_admin = existing_user.is_admin if existing_user else False
+    existing_user = await get_cached_user(db, message.from_user.id)
+    is_admin = existing_user.is_admin if existing_user else False
 
     await message.answer(
         "📋 <b>Главное меню</b>",
@@ -276,187 +298,143 @@ async def cmd_menu(message: Message):
 @router.callback_query(F.data == "menu_login")
 async def callback_menu_login(callback: CallbackQuery):
     """Handle login button from menu."""
-    user = callback.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-
-        if not existing_user:
-            existing_user = await auth_service.create_user(
-                telegram_id=user.id,
-                username=user.username,
-                display_name=user.full_name,
-            )
-
-        code = await auth_service.create_auth_code(user.id)
+    # Answer first: stops the client spinner before the DB work starts
+    await callback.answer()
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="menu_back")]
-        ])
+    code = await _ensure_user_and_code(callback.from_user)
 
-        await callback.message.edit_text(
-            f"🔐 <b>Ваш код для входа:</b>\n\n"
-            f"<code>{code}</code>\n\n"
-            f"Введите этот код на сайте для входа.\n"
-            f"Код действителен 5 минут.",
-            reply_markup=keyboard,
-        )
-
-    await callback.answer()
+    await callback.message.edit_text(
+        f"🔐 <b>Ваш код для входа:</b>\n\n"
+        f"<code>{code}</code>\n\n"
+        f"Введите этот код на сайте для входа.\n"
+        f"Код действителен 5 минут.",
+        reply_markup=_BACK_KEYBOARD,
+    )
 
 
 @router.callback_query(F.data == "menu_back")
-async def callback_menu_back(callback: CallbackQuery):
+async def callback_menu_back(callback: CallbackQuery, db: AsyncSession):
     """Return to main menu."""
-    user = callback.from_user
+    await callback.answer()
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-        is_admin = existing_user.is_admin if existing_user else False
+    existing_user = await get_cached_user(db, callback.from_user.id)
+    is_admin = existing_user.is_admin if existing_user else False
 
     await callback.message.edit_text(
         "📋 <b>Главное меню</b>",
         reply_markup=get_main_menu_keyboard(is_admin),
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data == "menu_newpost")
-async def callback_menu_newpost(callback: CallbackQuery, state: FSMContext):
+async def callback_menu_newpost(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Handle new post button from menu - redirect to post creation flow."""
     from src.bot.handlers.posts import PostCreation
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
 
     user = callback.from_user
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        db_user = await auth_service.get_user_by_telegram_id(user.id)
+    # Fast rejection from Redis; admins need the row for author_db_id
+    if await is_admin_cached(user.id) is False:
+        await callback.answer("❌ Только администраторы могут создавать посты.", show_alert=True)
+        return
 
-        if not db_user or not db_user.is_admin:
-            await callback.answer("❌ Только администраторы могут создавать посты.", show_alert=True)
-            return
-
-    # Show post type selection
-    builder = InlineKeyboardBuilder()
-    builder.button(text="📝 Текстовый пост", callback_data="post_type_text")
-    builder.button(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")
-    builder.button(text="◀️ Назад в меню", callback_data="menu_back_clear")
-    builder.adjust(1)
+    db_user = await get_cached_user(db, user.id)
+    if not db_user or not db_user.is_admin:
+        await callback.answer("❌ Только администраторы могут создавать посты.", show_alert=True)
+        return
 
+    await state.update_data(author_db_id=str(db_user.id))
     await state.set_state(PostCreation.waiting_for_type)
-    await callback.message.edit_text(
-        "📝 <b>Создание нового поста</b>\n\n"
-        "Выберите тип поста:",
-        reply_markup=builder.as_markup()
-    )
+    await callback.message.edit_text(_POST_TYPE_PROMPT, reply_markup=_POST_TYPE_KEYBOARD_MENU)
     await callback.answer()
 
 
 @router.callback_query(F.data == "menu_back_clear")
-async def callback_menu_back_clear(callback: CallbackQuery, state: FSMContext):
+async def callback_menu_back_clear(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Return to main menu and clear state."""
+    await callback.answer()
     await state.clear()
 
-    user = callback.from_user
-
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-        is_admin = existing_user.is_admin if existing_user else False
+    existing_user = await get_cached_user(db, callback.from_user.id)
+    is_admin = existing_user.is_admin if existing_user else False
 
     await callback.message.edit_text(
         "📋 <b>Главное меню</b>",
         reply_markup=get_main_menu_keyboard(is_admin),
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data == "menu_level")
-async def callback_menu_level(callback: CallbackQuery):
+async def callback_menu_level(callback: CallbackQuery, db: AsyncSession):
     """Show level info from menu."""
-    user = callback.from_user
+    db_user = await get_cached_user(db, callback.from_user.id)
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        db_user = await auth_service.get_user_by_telegram_id(user.id)
-
-        if not db_user:
-            await callback.answer("❌ Пользователь не найден", show_alert=True)
-            return
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="menu_back")]
-        ])
-
-        await callback.message.edit_text(
-            _format_level_message(db_user),
-            reply_markup=keyboard,
-        )
+    if not db_user:
+        await callback.answer("❌ Пользователь не найден", show_alert=True)
+        return
 
+    await callback.message.edit_text(
+        _format_level_message(db_user),
+        reply_markup=_BACK_KEYBOARD,
+    )
     await callback.answer()
 
 
 @router.callback_query(F.data == "menu_nickname")
-async def callback_menu_nickname(callback: CallbackQuery, state: FSMContext):
+async def callback_menu_nickname(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Handle nickname change button from menu."""
-    user = callback.from_user
+    existing_user = await get_cached_user(db, callback.from_user.id)
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
-
-        if not existing_user:
-            await callback.answer("❌ Пользователь не найден", show_alert=True)
-            return
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="◀️ Отмена", callback_data="menu_back_clear")]
-        ])
-
-        await state.set_state(NicknameChange.waiting_for_nickname)
-        await callback.message.edit_text(
-            f"✏️ <b>Смена ника</b>\n\n"
-            f"Текущий ник: <b>{existing_user.display_name}</b>\n\n"
-            f"Введите новый ник:",
-            reply_markup=keyboard,
-        )
+    if not existing_user:
+        await callback.answer("❌ Пользователь не найден", show_alert=True)
+        return
 
+    await state.set_state(NicknameChange.waiting_for_nickname)
+    await callback.message.edit_text(
+        f"✏️ <b>Смена ника</b>\n\n"
+        f"Текущий ник: <b>{existing_user.display_name}</b>\n\n"
+        f"Введите новый ник:",
+        reply_markup=_CANCEL_KEYBOARD,
+    )
     await callback.answer()
 
 
 @router.message(NicknameChange.waiting_for_nickname)
-async def process_nickname_change(message: Message, state: FSMContext):
+async def process_nickname_change(message: Message, state: FSMContext, db: AsyncSession):
     """Process new nickname input."""
     user = message.from_user
     new_nickname = message.text.strip() if message.text else ""
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user_service = UserService(db)
+    # Cheap check first: reject garbage input before any DB round-trip.
+    # The service re-validates as defense-in-depth.
+    error = None
+    if not new_nickname:
+        error = "Ник не может быть пустым"
+    elif len(new_nickname) > 128:
+        error = "Ник слишком длинный (макс. 128 символов)"
+    if error:
+        await message.answer(
+            f"❌ {error}\n\nПопробуйте ещё раз:",
+            reply_markup=_CANCEL_KEYBOARD,
+        )
+        return
 
-        existing_user = await auth_service.get_user_by_telegram_id(user.id)
+    existing_user = await get_cached_user(db, user.id)
 
-        if not existing_user:
-            await message.answer("❌ Пользователь не найден")
-            await state.clear()
-            return
+    if not existing_user:
+        await message.answer("❌ Пользователь не найден")
+        await state.clear()
+        return
 
-        try:
-            await user_service.update_display_name(existing_user.id, new_nickname)
-            await state.clear()
-            await message.answer(
-                f"✅ Ник успешно изменён на <b>{new_nickname}</b>!",
-                reply_markup=get_main_menu_keyboard(existing_user.is_admin),
-            )
-        except ValueError as e:
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="◀️ Отмена", callback_data="menu_back_clear")]
-            ])
-            await message.answer(
-                f"❌ {str(e)}\n\nПопробуйте ещё раз:",
-                reply_markup=keyboard,
-            )
+    try:
+        await UserService(db).update_display_name(existing_user.id, new_nickname)
+        await state.clear()
+        await message.answer(
+            f"✅ Ник успешно изменён на <b>{new_nickname}</b>!",
+            reply_markup=get_main_menu_keyboard(existing_user.is_admin),
+        )
+    except ValueError as e:
+        await message.answer(
+            f"❌ {str(e)}\n\nПопробуйте ещё раз:",
+            reply_markup=_CANCEL_KEYBOARD,
+        )
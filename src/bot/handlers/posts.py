@@ -1,18 +1,223 @@
-import io
+import asyncio
 import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+from uuid import UUID, uuid4
+
 from aiogram import Router, F, Bot
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
+from src.bot.middlewares import AlbumMiddleware
+from src.config import settings
+from src.core.redis import cache_delete, cache_get, cache_set
+from src.db.models.post import PostType, PostVisibility
 from src.db.session import get_db_context
-from src.services.auth import AuthService
+from src.services.media import MediaService
+from src.services.notification import notify_post_published
+from src.services.post import PostService
+from src.services.transcription import TranscriptionService
+from src.services.user_cache import get_cached_user
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# One handler call per Telegram album instead of one per file
+router.message.middleware(AlbumMiddleware())
+
+# Cap concurrent Telegram file fetches during album downloads
+_DOWNLOAD_SEMAPHORE = asyncio.Semaphore(4)
+
+
+async def _download_to_temp(bot: Bot, file_id: str, suffix: str) -> Path:
+    """Stream a Telegram file to a temp file on disk.
+
+    Keeps peak memory independent of file size. The caller owns the
+    returned file: pass it to MediaService.save_from_path (which
+    consumes it) or unlink it on failure.
+    """
+    file = await bot.get_file(file_id)
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    await bot.download_file(file.file_path, destination=tmp_path)
+    return Path(tmp_path)
+
+
+async def _edit_or_send(message: Message, text: str, *, reply_markup=None) -> None:
+    """edit_text with an answer() fallback when the message can't be edited."""
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest:
+        await message.answer(text, reply_markup=reply_markup)
+
+
+async def _ack_callback(callback: CallbackQuery, text: Optional[str] = None) -> None:
+    """Answer a callback query, ignoring query-timeout errors."""
+    try:
+        await callback.answer(text)
+    except TelegramBadRequest:
+        pass  # Query timeout - ignore
+
+
+# Keep strong references to fire-and-forget ack tasks until they finish
+_ack_tasks: set[asyncio.Task] = set()
+
+
+def _ack_callback_later(callback: CallbackQuery, text: Optional[str] = None) -> None:
+    """Fire the callback ack in the background.
+
+    The ack is pure UX (stops the button spinner) and nothing depends
+    on its result, so the handler's visible response doesn't have to
+    wait out its round-trip. Only safe in handlers with no
+    show_alert error path — a query can be answered once.
+    """
+    task = asyncio.create_task(_ack_callback(callback, text))
+    _ack_tasks.add(task)
+    task.add_done_callback(_ack_tasks.discard)
+
+
+def _lazy_strip(text: str) -> str:
+    """str.strip() copies the whole string even when there is nothing
+    to strip; Telegram messages rarely have edge whitespace, so probe
+    the ends first and skip the copy on the common path."""
+    if text and (text[0].isspace() or text[-1].isspace()):
+        return text.strip()
+    return text
+
+
+async def _safe_notify(post_id: UUID) -> None:
+    """Broadcast a published post in the background.
+
+    Opens its own session — the handler's session is closed by the time
+    a broadcast over many subscribers finishes. Failures are logged, not
+    surfaced: the post is already published either way.
+    """
+    try:
+        async with get_db_context() as db:
+            post = await PostService(db).get_post_by_id(post_id)
+            if post is not None:
+                await notify_post_published(db, post)
+    except Exception as e:
+        logger.error(f"Failed to notify subscribers about post {post_id}: {e}")
+
+
+# Keep strong references to in-flight notification broadcasts
+_notify_tasks: set[asyncio.Task] = set()
+
+
+# Transcription cache: keyed by Telegram's file_unique_id (stable across
+# re-uploads of the same file), so a retry never pays for Whisper twice.
+# The formatted text is cached, skipping the LLM format pass too.
+_TX_CACHE_PREFIX = "tx:"
+_TX_CACHE_TTL = 7 * 86400  # seconds
+
+# Transcribed drafts can be tens of KB; they live under their own Redis
+# key so FSM data (rewritten on every step) stays ~100 bytes.
+_CONTENT_REF_TTL = 86400  # seconds
+
+
+async def _transcribe_and_store(
+    tmp_path: Path,
+    filename: str,
+    mime_type: str,
+    telegram_file_id: str,
+    file_unique_id: str,
+    uploader_id: UUID,
+    existing_media_id: Optional[str] = None,
+) -> tuple[Union[str, Exception], Optional[str], bool]:
+    """Run Whisper transcription and the media save concurrently.
+
+    The two steps are independent, so latency drops from
+    T_transcribe + T_save to max of the two (Whisper dominates). The
+    formatted transcription is cached in Redis by file_unique_id, so
+    re-uploads of the same file skip Whisper and the format pass
+    entirely. Returns (text or the transcription exception, media_id or
+    None, from_cache). On a cache miss the text is raw — the LLM format
+    pass runs in the background (see _format_and_store) while the user
+    decides what to do with the draft. The save copies from the temp
+    file so both tasks can read it; the caller unlinks the temp file
+    afterwards. With ``existing_media_id`` (re-upload of a file we
+    already stored) the save step is skipped entirely.
+    """
+
+    async def _save() -> Optional[str]:
+        async with get_db_context() as db:
+            media = await MediaService(db).save_from_path(
+                tmp_path,
+                filename=filename,
+                mime_type=mime_type,
+                uploader_id=uploader_id,
+                telegram_file_id=telegram_file_id,
+                telegram_unique_id=file_unique_id,
+                consume=False,
+            )
+            return str(media.id)
+
+    cache_key = f"{_TX_CACHE_PREFIX}{file_unique_id}"
+    try:
+        cached = await cache_get(cache_key)
+    except Exception:
+        cached = None
+
+    if cached is not None:
+        if existing_media_id is not None:
+            return cached, existing_media_id, True
+        try:
+            media_id = await _save()
+        except Exception as e:
+            logger.error(f"Failed to save media for uploader {uploader_id}: {e}")
+            media_id = None
+        return cached, media_id, True
+
+    if existing_media_id is not None:
+        try:
+            text = await TranscriptionService().transcribe_file(tmp_path, filename)
+        except Exception as e:
+            return e, existing_media_id, False
+        return text, existing_media_id, False
+
+    text, media_id = await asyncio.gather(
+        TranscriptionService().transcribe_file(tmp_path, filename),
+        _save(),
+        return_exceptions=True,
+    )
+    # A failed save must not lose the transcription (and vice versa)
+    if isinstance(media_id, Exception):
+        logger.error(f"Failed to save media for uploader {uploader_id}: {media_id}")
+        media_id = None
+
+    return text, media_id, False
+
+
+# Background format tasks, one per Telegram user (a user drives at most
+# one post-creation flow at a time). The content_ref guards against a
+# cancelled draft's task leaking into the next one.
+_format_tasks: dict[int, tuple[Optional[str], asyncio.Task]] = {}
+
+
+async def _format_and_store(
+    raw_text: str, cache_key: str, content_ref: Optional[str]
+) -> str:
+    """Run the LLM format pass and refresh the Redis copies.
+
+    Runs in the background while the user decides whether to keep the
+    original audio, so the format latency overlaps with think time.
+    """
+    formatted = await TranscriptionService().format_transcription(raw_text)
+    try:
+        await cache_set(cache_key, formatted, ttl=_TX_CACHE_TTL)
+        if content_ref:
+            await cache_set(content_ref, formatted, ttl=_CONTENT_REF_TTL)
+    except Exception:
+        pass  # Non-critical
+    return formatted
+
 
 class PostCreation(StatesGroup):
     waiting_for_type = State()          # выбор типа поста (текст/аудио/фото)
@@ -24,38 +229,210 @@ class PostCreation(StatesGroup):
     waiting_for_publish_choice = State()  # Черновик или опубликовать
 
 
+# Static inline keyboards, built once at import time — every send used
+# to rebuild the same InlineKeyboardBuilder per message
+_POST_TYPE_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📝 Текстовый пост", callback_data="post_type_text")],
+    [InlineKeyboardButton(text="📷 Фото/Видео пост", callback_data="post_type_photo")],
+    [InlineKeyboardButton(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")],
+])
+
+_VISIBILITY_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🌍 Публичный", callback_data="vis_public"),
+        InlineKeyboardButton(text="👤 Для зарегистрированных", callback_data="vis_registered"),
+    ],
+    [
+        InlineKeyboardButton(text="⭐ Premium 1", callback_data="vis_premium_1"),
+        InlineKeyboardButton(text="💎 Premium 2", callback_data="vis_premium_2"),
+    ],
+])
+
+_MEDIA_DONE_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="✅ Готово - Создать пост", callback_data="media_done")],
+])
+
+_MEDIA_DONE_SKIP_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="✅ Готово - Создать пост", callback_data="media_done")],
+    [InlineKeyboardButton(text="❌ Пропустить медиа", callback_data="media_skip")],
+])
+
+_PUBLISH_CHOICE_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🚀 Опубликовать сейчас", callback_data="publish_now")],
+    [InlineKeyboardButton(text="📝 Сохранить как черновик", callback_data="publish_draft")],
+])
+
+# Static keyboards for the save-original confirmation, one per media label
+_SAVE_MEDIA_KEYBOARDS = {
+    "аудио": InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Да, сохранить аудио", callback_data="audio_save_yes"),
+            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
+        ]
+    ]),
+    "видео": InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Да, сохранить видео", callback_data="audio_save_yes"),
+            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
+        ]
+    ]),
+}
+
+# Final confirmation — parsed once at import, filled per post
+_POST_CREATED_TMPL = (
+    "✅ <b>Пост создан!</b>\n\n"
+    "📝 {title}\n"
+    "👁 Видимость: {visibility}\n"
+    "📄 Статус: {status}{media}\n\n"
+    "<a href='{url}'>Открыть пост</a>"
+)
+
+
+async def _handle_media_transcription(
+    message: Message,
+    state: FSMContext,
+    bot: Bot,
+    *,
+    file_id: str,
+    file_unique_id: str,
+    filename: str,
+    mime_type: str,
+    media_label: str,
+    wrong_type_text: str,
+    progress_text: str,
+    no_speech_text: str,
+) -> None:
+    """Shared download -> transcribe -> save -> confirm flow.
+
+    The voice/video-note/audio/video handlers differ only in how the
+    file object and user-facing texts are derived; everything else
+    lives here once.
+    """
+    data = await state.get_data()
+    if data.get("post_type", "text") != "voice":
+        await message.answer(wrong_type_text)
+        return
+
+    # Author id was cached in FSM data at /newpost time
+    author_db_id = data.get("author_db_id")
+    if not author_db_id:
+        await message.answer("❌ Пользователь не найден.")
+        return
+
+    # Re-upload of a file we already stored? Skip download and save,
+    # transcribe straight from the media store.
+    existing_media_id: Optional[str] = None
+    async with get_db_context() as db:
+        existing = await MediaService(db).find_reusable(
+            file_unique_id, UUID(author_db_id)
+        )
+        if existing is not None:
+            existing_media_id = str(existing.id)
+            src_path = settings.upload_dir / existing.file_path
+
+    await message.answer(progress_text)
+
+    tmp_path: Optional[Path] = None
+    if existing_media_id is None:
+        try:
+            tmp_path = await _download_to_temp(
+                bot, file_id, os.path.splitext(filename)[1] or ""
+            )
+        except Exception as e:
+            await message.answer(f"❌ Ошибка загрузки файла: {e}")
+            return
+        src_path = tmp_path
+
+    # Transcribe (cached by file_unique_id) and save the media concurrently
+    text, voice_media_id, from_cache = await _transcribe_and_store(
+        src_path,
+        filename,
+        mime_type,
+        file_id,
+        file_unique_id,
+        UUID(author_db_id),
+        existing_media_id=existing_media_id,
+    )
+    if tmp_path is not None:
+        tmp_path.unlink(missing_ok=True)
+
+    if isinstance(text, Exception):
+        await message.answer(f"❌ Ошибка транскрибации: {text}")
+        return
+
+    if not text or text.isspace():
+        await message.answer(no_speech_text)
+        return
+
+    # Store the transcription under its own Redis key and keep only a
+    # reference in FSM data (see _CONTENT_REF_TTL)
+    content_ref: Optional[str] = None
+    try:
+        content_ref = f"post_draft:{message.from_user.id}:{uuid4()}"
+        await cache_set(content_ref, text, ttl=_CONTENT_REF_TTL)
+        await state.update_data(
+            content_ref=content_ref,
+            voice_media_id=voice_media_id,
+            media_type_label=media_label,
+        )
+    except Exception:
+        # Redis hiccup — carry the text inline as before
+        content_ref = None
+        await state.update_data(
+            content=text,
+            voice_media_id=voice_media_id,
+            media_type_label=media_label,
+        )
+
+    # Kick off the LLM format pass in the background; it overlaps with
+    # the user's save/discard decision and lands in Redis + the task
+    # result awaited at publish time (cache hits are already formatted)
+    if not from_cache:
+        fmt_task = asyncio.create_task(
+            _format_and_store(
+                text, f"{_TX_CACHE_PREFIX}{file_unique_id}", content_ref
+            )
+        )
+        _format_tasks[message.from_user.id] = (content_ref, fmt_task)
+
+    # Ask about saving the original media
+    await state.set_state(PostCreation.confirm_save_audio)
+    await message.answer(
+        f"📝 <b>Транскрипция:</b>\n\n{text}\n\n"
+        f"Сохранить оригинальное {media_label} к посту?",
+        reply_markup=_SAVE_MEDIA_KEYBOARDS[media_label],
+    )
+
+
 @router.message(Command("newpost"))
 async def cmd_newpost(message: Message, state: FSMContext):
     """Start creating a new post."""
     user = message.from_user
 
+    # Short-TTL memo: back-to-back /newpost calls (and the auth menu
+    # handlers) share one SELECT per minute per user
     async with get_db_context() as db:
-        auth_service = AuthService(db)
-        db_user = await auth_service.get_user_by_telegram_id(user.id)
+        db_user = await get_cached_user(db, user.id)
 
-        if not db_user or not db_user.is_admin:
-            await message.answer("❌ Только администраторы могут создавать посты.")
-            return
+    if not db_user or not db_user.is_admin:
+        await message.answer("❌ Только администраторы могут создавать посты.")
+        return
 
-    # Show post type selection
-    builder = InlineKeyboardBuilder()
-    builder.button(text="📝 Текстовый пост", callback_data="post_type_text")
-    builder.button(text="📷 Фото/Видео пост", callback_data="post_type_photo")
-    builder.button(text="🎤 Аудио/Видео пост", callback_data="post_type_voice")
-    builder.adjust(1)
+    # Cache the author's DB id so media/publish handlers skip the
+    # per-update user lookup (admin is already verified here)
+    await state.update_data(author_db_id=str(db_user.id))
 
+    # Show post type selection
     await state.set_state(PostCreation.waiting_for_type)
     await message.answer(
         "📝 <b>Создание нового поста</b>\n\n"
         "Выберите тип поста:",
-        reply_markup=builder.as_markup()
+        reply_markup=_POST_TYPE_KB,
     )
 
 
-@router.callback_query(F.data.startswith("post_type_"), PostCreation.waiting_for_type)
 async def process_post_type(callback: CallbackQuery, state: FSMContext):
     """Process post type selection."""
-    from aiogram.exceptions import TelegramBadRequest
 
     if "voice" in callback.data:
         post_type = "voice"
@@ -79,32 +456,19 @@ async def process_post_type(callback: CallbackQuery, state: FSMContext):
         await state.set_state(PostCreation.waiting_for_media)
         await state.update_data(content="", media_ids=[])
 
-        builder = InlineKeyboardBuilder()
-        builder.button(text="✅ Готово - Создать пост", callback_data="media_done")
-        builder.adjust(1)
-
         msg_text = (
             f"✅ Тип: <b>{type_label}</b>\n\n"
             "Отправляйте <b>фото и видео</b> по одному.\n"
             "Когда закончите — нажмите <b>Готово</b>.\n\n"
             "Можете также отправить текст — он станет заголовком поста."
         )
-        try:
-            await callback.message.edit_text(msg_text, reply_markup=builder.as_markup())
-        except TelegramBadRequest:
-            await callback.message.answer(msg_text, reply_markup=builder.as_markup())
+        await _edit_or_send(callback.message, msg_text, reply_markup=_MEDIA_DONE_KB)
     else:
         await state.set_state(PostCreation.waiting_for_title)
         msg_text = f"✅ Тип: <b>{type_label}</b>\n\nОтправьте <b>заголовок</b> поста:"
-        try:
-            await callback.message.edit_text(msg_text)
-        except TelegramBadRequest:
-            await callback.message.answer(msg_text)
+        await _edit_or_send(callback.message, msg_text)
 
-    try:
-        await callback.answer()
-    except TelegramBadRequest:
-        pass  # Query timeout - ignore
+    _ack_callback_later(callback)
 
 
 @router.message(Command("cancel"))
@@ -128,7 +492,7 @@ async def process_title(message: Message, state: FSMContext):
         await message.answer("⚠️ Пожалуйста, отправьте текстовый заголовок.")
         return
 
-    title = message.text.strip()
+    title = _lazy_strip(message.text)
 
     if len(title) < 3:
         await message.answer("Заголовок слишком короткий. Минимум 3 символа.")
@@ -169,7 +533,7 @@ async def process_content_text(message: Message, state: FSMContext):
         await message.answer("⚠️ Отправьте голосовое сообщение или видео-кружочек, не текст.")
         return
 
-    content = message.text.strip()
+    content = _lazy_strip(message.text)
 
     if len(content) < 10:
         await message.answer("Текст слишком короткий. Минимум 10 символов.")
@@ -182,356 +546,77 @@ async def process_content_text(message: Message, state: FSMContext):
 @router.message(PostCreation.waiting_for_content, F.voice)
 async def process_content_voice(message: Message, state: FSMContext, bot: Bot):
     """Process voice message content - transcribe and ask to save."""
-    from src.services.transcription import TranscriptionService
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    data = await state.get_data()
-    post_type = data.get("post_type", "text")
-
-    # Check if user should send text instead
-    if post_type != "voice":
-        await message.answer("⚠️ Отправьте текст, не голосовое сообщение.")
-        return
-
-    await message.answer("🎤 Транскрибирую голосовое сообщение...")
-
-    # Download voice file
-    try:
-        file = await bot.get_file(message.voice.file_id)
-        file_bytes = io.BytesIO()
-        await bot.download_file(file.file_path, file_bytes)
-        voice_content = file_bytes.getvalue()
-    except Exception as e:
-        await message.answer(f"❌ Ошибка загрузки файла: {e}")
-        return
-
-    # Transcribe
-    transcription_service = TranscriptionService()
-    try:
-        text = await transcription_service.transcribe_bytes(
-            content=voice_content,
-            filename=f"voice_{message.voice.file_unique_id}.ogg"
-        )
-    except Exception as e:
-        await message.answer(f"❌ Ошибка транскрибации: {e}")
-        return
-
-    if not text or not text.strip():
-        await message.answer("❌ Не удалось распознать речь в сообщении.")
-        return
-
-    # Format transcription with AI
-    text = await transcription_service.format_transcription(text)
-
-    # Save audio immediately to avoid storing bytes in Redis
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(message.from_user.id)
-        if user:
-            media_service = MediaService(db)
-            media = await media_service.save_from_bytes(
-                content=voice_content,
-                filename=f"voice_{message.voice.file_unique_id}.ogg",
-                mime_type="audio/ogg",
-                uploader_id=user.id,
-                telegram_file_id=message.voice.file_id,
-            )
-            voice_media_id = str(media.id)
-        else:
-            voice_media_id = None
-
-    # Store transcription and media ID (not bytes!)
-    await state.update_data(
-        content=text,
-        voice_media_id=voice_media_id,
-        media_type_label="аудио",
-    )
-
-    # Ask about saving audio
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да, сохранить аудио", callback_data="audio_save_yes"),
-            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
-        ]
-    ])
-
-    await state.set_state(PostCreation.confirm_save_audio)
-    await message.answer(
-        f"📝 <b>Транскрипция:</b>\n\n{text}\n\n"
-        "Сохранить оригинальное аудио к посту?",
-        reply_markup=keyboard,
+    await _handle_media_transcription(
+        message,
+        state,
+        bot,
+        file_id=message.voice.file_id,
+        file_unique_id=message.voice.file_unique_id,
+        filename=f"voice_{message.voice.file_unique_id}.ogg",
+        mime_type="audio/ogg",
+        media_label="аудио",
+        wrong_type_text="⚠️ Отправьте текст, не голосовое сообщение.",
+        progress_text="🎤 Транскрибирую голосовое сообщение...",
+        no_speech_text="❌ Не удалось распознать речь в сообщении.",
     )
 
 
 @router.message(PostCreation.waiting_for_content, F.video_note)
 async def process_content_video_note(message: Message, state: FSMContext, bot: Bot):
     """Process video note (circle video) content - transcribe and ask to save."""
-    from src.services.transcription import TranscriptionService
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    data = await state.get_data()
-    post_type = data.get("post_type", "text")
-
-    # Check if user should send text instead
-    if post_type != "voice":
-        await message.answer("⚠️ Отправьте текст, не видео-кружочек.")
-        return
-
-    await message.answer("🎬 Транскрибирую видео-кружочек...")
-
-    # Download video note
-    try:
-        file = await bot.get_file(message.video_note.file_id)
-        file_bytes = io.BytesIO()
-        await bot.download_file(file.file_path, file_bytes)
-        video_content = file_bytes.getvalue()
-    except Exception as e:
-        await message.answer(f"❌ Ошибка загрузки файла: {e}")
-        return
-
-    # Transcribe
-    transcription_service = TranscriptionService()
-    try:
-        text = await transcription_service.transcribe_bytes(
-            content=video_content,
-            filename=f"video_note_{message.video_note.file_unique_id}.mp4"
-        )
-    except Exception as e:
-        await message.answer(f"❌ Ошибка транскрибации: {e}")
-        return
-
-    if not text or not text.strip():
-        await message.answer("❌ Не удалось распознать речь в видео.")
-        return
-
-    # Format transcription with AI
-    text = await transcription_service.format_transcription(text)
-
-    # Save video immediately to avoid storing bytes in Redis
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(message.from_user.id)
-        if user:
-            media_service = MediaService(db)
-            media = await media_service.save_from_bytes(
-                content=video_content,
-                filename=f"video_note_{message.video_note.file_unique_id}.mp4",
-                mime_type="video/mp4",
-                uploader_id=user.id,
-                telegram_file_id=message.video_note.file_id,
-            )
-            voice_media_id = str(media.id)
-        else:
-            voice_media_id = None
-
-    # Store transcription and media ID (not bytes!)
-    await state.update_data(
-        content=text,
-        voice_media_id=voice_media_id,
-        media_type_label="видео",
-    )
-
-    # Ask about saving video
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да, сохранить видео", callback_data="audio_save_yes"),
-            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
-        ]
-    ])
-
-    await state.set_state(PostCreation.confirm_save_audio)
-    await message.answer(
-        f"📝 <b>Транскрипция:</b>\n\n{text}\n\n"
-        "Сохранить оригинальное видео к посту?",
-        reply_markup=keyboard,
+    await _handle_media_transcription(
+        message,
+        state,
+        bot,
+        file_id=message.video_note.file_id,
+        file_unique_id=message.video_note.file_unique_id,
+        filename=f"video_note_{message.video_note.file_unique_id}.mp4",
+        mime_type="video/mp4",
+        media_label="видео",
+        wrong_type_text="⚠️ Отправьте текст, не видео-кружочек.",
+        progress_text="🎬 Транскрибирую видео-кружочек...",
+        no_speech_text="❌ Не удалось распознать речь в видео.",
     )
 
 
 @router.message(PostCreation.waiting_for_content, F.audio)
 async def process_content_audio_file(message: Message, state: FSMContext, bot: Bot):
     """Process regular audio file content - transcribe and ask to save."""
-    from src.services.transcription import TranscriptionService
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    logger.info(f"Received audio file from user {message.from_user.id}")
-
-    data = await state.get_data()
-    post_type = data.get("post_type", "text")
-    logger.info(f"Current post_type: {post_type}")
-
-    # Check if user should send text instead
-    if post_type != "voice":
-        await message.answer("⚠️ Отправьте текст, не аудиофайл.")
-        return
-
-    await message.answer("🎤 Транскрибирую аудиофайл...")
-
-    # Download audio file
-    try:
-        file = await bot.get_file(message.audio.file_id)
-        file_bytes = io.BytesIO()
-        await bot.download_file(file.file_path, file_bytes)
-        audio_content = file_bytes.getvalue()
-    except Exception as e:
-        await message.answer(f"❌ Ошибка загрузки файла: {e}")
-        return
-
-    # Transcribe
-    filename = message.audio.file_name or f"audio_{message.audio.file_unique_id}.mp3"
-    transcription_service = TranscriptionService()
-    try:
-        text = await transcription_service.transcribe_bytes(
-            content=audio_content,
-            filename=filename
-        )
-    except Exception as e:
-        await message.answer(f"❌ Ошибка транскрибации: {e}")
-        return
-
-    if not text or not text.strip():
-        await message.answer("❌ Не удалось распознать речь в аудио.")
-        return
-
-    # Format transcription with AI
-    text = await transcription_service.format_transcription(text)
-
-    # Save audio immediately to avoid storing bytes in Redis
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(message.from_user.id)
-        if user:
-            media_service = MediaService(db)
-            media = await media_service.save_from_bytes(
-                content=audio_content,
-                filename=filename,
-                mime_type=message.audio.mime_type or "audio/mpeg",
-                uploader_id=user.id,
-                telegram_file_id=message.audio.file_id,
-            )
-            voice_media_id = str(media.id)
-        else:
-            voice_media_id = None
-
-    # Store transcription and media ID (not bytes!)
-    await state.update_data(
-        content=text,
-        voice_media_id=voice_media_id,
-        media_type_label="аудио",
-    )
-
-    # Ask about saving audio
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да, сохранить аудио", callback_data="audio_save_yes"),
-            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
-        ]
-    ])
-
-    await state.set_state(PostCreation.confirm_save_audio)
-    await message.answer(
-        f"📝 <b>Транскрипция:</b>\n\n{text}\n\n"
-        "Сохранить оригинальное аудио к посту?",
-        reply_markup=keyboard,
+    await _handle_media_transcription(
+        message,
+        state,
+        bot,
+        file_id=message.audio.file_id,
+        file_unique_id=message.audio.file_unique_id,
+        filename=message.audio.file_name or f"audio_{message.audio.file_unique_id}.mp3",
+        mime_type=message.audio.mime_type or "audio/mpeg",
+        media_label="аудио",
+        wrong_type_text="⚠️ Отправьте текст, не аудиофайл.",
+        progress_text="🎤 Транскрибирую аудиофайл...",
+        no_speech_text="❌ Не удалось распознать речь в аудио.",
     )
 
 
 @router.message(PostCreation.waiting_for_content, F.video)
 async def process_content_video_file(message: Message, state: FSMContext, bot: Bot):
     """Process regular video file content - transcribe and ask to save."""
-    from src.services.transcription import TranscriptionService
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    data = await state.get_data()
-    post_type = data.get("post_type", "text")
-
-    # Check if user should send text instead
-    if post_type != "voice":
-        await message.answer("⚠️ Отправьте текст, не видеофайл.")
-        return
-
-    await message.answer("🎬 Транскрибирую видеофайл...")
-
-    # Download video file
-    try:
-        file = await bot.get_file(message.video.file_id)
-        file_bytes = io.BytesIO()
-        await bot.download_file(file.file_path, file_bytes)
-        video_content = file_bytes.getvalue()
-    except Exception as e:
-        await message.answer(f"❌ Ошибка загрузки файла: {e}")
-        return
-
-    # Transcribe
-    filename = message.video.file_name or f"video_{message.video.file_unique_id}.mp4"
-    transcription_service = TranscriptionService()
-    try:
-        text = await transcription_service.transcribe_bytes(
-            content=video_content,
-            filename=filename
-        )
-    except Exception as e:
-        await message.answer(f"❌ Ошибка транскрибации: {e}")
-        return
-
-    if not text or not text.strip():
-        await message.answer("❌ Не удалось распознать речь в видео.")
-        return
-
-    # Format transcription with AI
-    text = await transcription_service.format_transcription(text)
-
-    # Save video immediately to avoid storing bytes in Redis
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(message.from_user.id)
-        if user:
-            media_service = MediaService(db)
-            media = await media_service.save_from_bytes(
-                content=video_content,
-                filename=filename,
-                mime_type=message.video.mime_type or "video/mp4",
-                uploader_id=user.id,
-                telegram_file_id=message.video.file_id,
-            )
-            voice_media_id = str(media.id)
-        else:
-            voice_media_id = None
-
-    # Store transcription and media ID (not bytes!)
-    await state.update_data(
-        content=text,
-        voice_media_id=voice_media_id,
-        media_type_label="видео",
-    )
-
-    # Ask about saving video
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="✅ Да, сохранить видео", callback_data="audio_save_yes"),
-            InlineKeyboardButton(text="❌ Только текст", callback_data="audio_save_no"),
-        ]
-    ])
-
-    await state.set_state(PostCreation.confirm_save_audio)
-    await message.answer(
-        f"📝 <b>Транскрипция:</b>\n\n{text}\n\n"
-        "Сохранить оригинальное видео к посту?",
-        reply_markup=keyboard,
+    await _handle_media_transcription(
+        message,
+        state,
+        bot,
+        file_id=message.video.file_id,
+        file_unique_id=message.video.file_unique_id,
+        filename=message.video.file_name or f"video_{message.video.file_unique_id}.mp4",
+        mime_type=message.video.mime_type or "video/mp4",
+        media_label="видео",
+        wrong_type_text="⚠️ Отправьте текст, не видеофайл.",
+        progress_text="🎬 Транскрибирую видеофайл...",
+        no_speech_text="❌ Не удалось распознать речь в видео.",
     )
 
 
-@router.callback_query(F.data.startswith("audio_save_"), PostCreation.confirm_save_audio)
 async def process_audio_save_choice(callback: CallbackQuery, state: FSMContext):
     """Process user's choice to save or discard original audio/video."""
-    from aiogram.exceptions import TelegramBadRequest
 
     save_audio = "yes" in callback.data
     await state.update_data(save_original_audio=save_audio)
@@ -540,49 +625,31 @@ async def process_audio_save_choice(callback: CallbackQuery, state: FSMContext):
     media_type_label = data.get("media_type_label", "аудио")
     status = f"с {media_type_label}" if save_audio else f"без {media_type_label}"
 
-    try:
-        await callback.message.edit_text(
-            f"✅ {status.capitalize()}\n\n"
-            f"📝 Контент сохранён.\n\n"
-            "Теперь выберите уровень видимости:"
-        )
-    except TelegramBadRequest:
-        await callback.message.answer(
-            f"✅ {status.capitalize()}\n\n"
-            f"📝 Контент сохранён.\n\n"
-            "Теперь выберите уровень видимости:"
-        )
+    await _edit_or_send(
+        callback.message,
+        f"✅ {status.capitalize()}\n\n"
+        f"📝 Контент сохранён.\n\n"
+        "Теперь выберите уровень видимости:",
+    )
 
     await _show_visibility_keyboard(callback.message, state, edit=False)
 
-    try:
-        await callback.answer()
-    except TelegramBadRequest:
-        pass  # Query timeout - ignore
+    _ack_callback_later(callback)
 
 
 async def _show_visibility_keyboard(message: Message, state: FSMContext, edit: bool = False):
     """Show visibility selection keyboard."""
     await state.set_state(PostCreation.waiting_for_visibility)
 
-    builder = InlineKeyboardBuilder()
-    builder.button(text="🌍 Публичный", callback_data="vis_public")
-    builder.button(text="👤 Для зарегистрированных", callback_data="vis_registered")
-    builder.button(text="⭐ Premium 1", callback_data="vis_premium_1")
-    builder.button(text="💎 Premium 2", callback_data="vis_premium_2")
-    builder.adjust(2)
-
     text = "Выберите уровень видимости:"
     if edit:
-        await message.edit_text(text, reply_markup=builder.as_markup())
+        await message.edit_text(text, reply_markup=_VISIBILITY_KB)
     else:
-        await message.answer(text, reply_markup=builder.as_markup())
+        await message.answer(text, reply_markup=_VISIBILITY_KB)
 
 
-@router.callback_query(F.data.startswith("vis_"), PostCreation.waiting_for_visibility)
 async def process_visibility(callback: CallbackQuery, state: FSMContext):
     """Process visibility selection and ask about media or publishing."""
-    from aiogram.exceptions import TelegramBadRequest
 
     visibility = callback.data.replace("vis_", "")
     data = await state.get_data()
@@ -593,26 +660,12 @@ async def process_visibility(callback: CallbackQuery, state: FSMContext):
         await state.update_data(visibility=visibility)
         await state.set_state(PostCreation.waiting_for_publish_choice)
 
-        builder = InlineKeyboardBuilder()
-        builder.button(text="🚀 Опубликовать сейчас", callback_data="publish_now")
-        builder.button(text="📝 Сохранить как черновик", callback_data="publish_draft")
-        builder.adjust(1)
-
-        try:
-            await callback.message.edit_text(
-                "📄 <b>Последний шаг</b>\n\nВыберите действие:",
-                reply_markup=builder.as_markup(),
-            )
-        except TelegramBadRequest:
-            await callback.message.answer(
-                "📄 <b>Последний шаг</b>\n\nВыберите действие:",
-                reply_markup=builder.as_markup(),
-            )
-
-        try:
-            await callback.answer()
-        except TelegramBadRequest:
-            pass
+        await _edit_or_send(
+            callback.message,
+            "📄 <b>Последний шаг</b>\n\nВыберите действие:",
+            reply_markup=_PUBLISH_CHOICE_KB,
+        )
+        _ack_callback_later(callback)
         return
 
     await state.update_data(visibility=visibility, media_ids=[])
@@ -626,32 +679,16 @@ async def process_visibility(callback: CallbackQuery, state: FSMContext):
     }
     vis_label = visibility_labels.get(visibility, visibility)
 
-    builder = InlineKeyboardBuilder()
-    builder.button(text="✅ Готово - Создать пост", callback_data="media_done")
-    builder.button(text="❌ Пропустить медиа", callback_data="media_skip")
-    builder.adjust(1)
-
-    try:
-        await callback.message.edit_text(
-            f"✅ Видимость: <b>{vis_label}</b>\n\n"
-            "Теперь можете отправить <b>медиафайлы</b> (фото, аудио, видео).\n"
-            "Отправляйте файлы по одному, затем нажмите 'Готово'.\n\n"
-            "Или нажмите 'Пропустить медиа' для создания поста без файлов.",
-            reply_markup=builder.as_markup(),
-        )
-    except TelegramBadRequest:
-        await callback.message.answer(
-            f"✅ Видимость: <b>{vis_label}</b>\n\n"
-            "Теперь можете отправить <b>медиафайлы</b> (фото, аудио, видео).\n"
-            "Отправляйте файлы по одному, затем нажмите 'Готово'.\n\n"
-            "Или нажмите 'Пропустить медиа' для создания поста без файлов.",
-            reply_markup=builder.as_markup(),
-        )
+    await _edit_or_send(
+        callback.message,
+        f"✅ Видимость: <b>{vis_label}</b>\n\n"
+        "Теперь можете отправить <b>медиафайлы</b> (фото, аудио, видео).\n"
+        "Отправляйте файлы по одному, затем нажмите 'Готово'.\n\n"
+        "Или нажмите 'Пропустить медиа' для создания поста без файлов.",
+        reply_markup=_MEDIA_DONE_SKIP_KB,
+    )
 
-    try:
-        await callback.answer()
-    except TelegramBadRequest:
-        pass  # Query timeout - ignore
+    _ack_callback_later(callback)
 
 
 @router.message(PostCreation.waiting_for_media, F.text)
@@ -661,7 +698,7 @@ async def process_media_text(message: Message, state: FSMContext):
     post_type = data.get("post_type")
 
     if post_type == "photo":
-        title = message.text.strip()
+        title = _lazy_strip(message.text)
         await state.update_data(title=title)
         await message.answer(
             f"✅ Заголовок: <b>{title}</b>\n\n"
@@ -672,137 +709,233 @@ async def process_media_text(message: Message, state: FSMContext):
 
 
 @router.message(PostCreation.waiting_for_media, F.photo)
-async def process_media_photo(message: Message, state: FSMContext, bot: Bot):
-    """Process uploaded photo."""
+async def process_media_photo(
+    message: Message, state: FSMContext, bot: Bot,
+    album: Optional[list[Message]] = None,
+):
+    """Process uploaded photo (or a whole album)."""
+    if album:
+        await _save_telegram_media_group(album, state, bot)
+        return
     await _save_telegram_media(message, state, bot, "image")
 
 
 @router.message(PostCreation.waiting_for_media, F.audio)
-async def process_media_audio(message: Message, state: FSMContext, bot: Bot):
-    """Process uploaded audio."""
+async def process_media_audio(
+    message: Message, state: FSMContext, bot: Bot,
+    album: Optional[list[Message]] = None,
+):
+    """Process uploaded audio (or a whole album)."""
+    if album:
+        await _save_telegram_media_group(album, state, bot)
+        return
     await _save_telegram_media(message, state, bot, "audio")
 
 
 @router.message(PostCreation.waiting_for_media, F.video)
-async def process_media_video(message: Message, state: FSMContext, bot: Bot):
-    """Process uploaded video."""
+async def process_media_video(
+    message: Message, state: FSMContext, bot: Bot,
+    album: Optional[list[Message]] = None,
+):
+    """Process uploaded video (or a whole album)."""
+    if album:
+        await _save_telegram_media_group(album, state, bot)
+        return
     await _save_telegram_media(message, state, bot, "video")
 
 
 @router.message(PostCreation.waiting_for_media, F.document)
-async def process_media_document(message: Message, state: FSMContext, bot: Bot):
+async def process_media_document(
+    message: Message, state: FSMContext, bot: Bot,
+    album: Optional[list[Message]] = None,
+):
     """Process uploaded document (check if it's media)."""
+    if album:
+        await _save_telegram_media_group(album, state, bot)
+        return
+
     doc = message.document
     mime = doc.mime_type or ""
 
     if mime.startswith("image/"):
-        await _save_telegram_media(message, state, bot, "image", is_document=True)
+        await _save_telegram_media(message, state, bot, "image")
     elif mime.startswith("audio/"):
-        await _save_telegram_media(message, state, bot, "audio", is_document=True)
+        await _save_telegram_media(message, state, bot, "audio")
     elif mime.startswith("video/"):
-        await _save_telegram_media(message, state, bot, "video", is_document=True)
+        await _save_telegram_media(message, state, bot, "video")
     elif mime == "application/pdf":
-        await _save_telegram_media(message, state, bot, "document", is_document=True)
+        await _save_telegram_media(message, state, bot, "document")
     else:
         await message.answer("⚠️ Неподдерживаемый тип файла. Отправьте изображение, аудио, видео или PDF.")
 
 
+def _extract_file_info(message: Message) -> tuple[str, str, str, str]:
+    """Derive (file_id, file_unique_id, filename, mime_type) from a media message."""
+    if message.photo:
+        file = message.photo[-1]  # Largest size
+        return (
+            file.file_id,
+            file.file_unique_id,
+            f"photo_{file.file_unique_id}.jpg",
+            "image/jpeg",
+        )
+    if message.audio:
+        file = message.audio
+        return (
+            file.file_id,
+            file.file_unique_id,
+            file.file_name or f"audio_{file.file_unique_id}.mp3",
+            file.mime_type or "audio/mpeg",
+        )
+    if message.video:
+        file = message.video
+        return (
+            file.file_id,
+            file.file_unique_id,
+            file.file_name or f"video_{file.file_unique_id}.mp4",
+            file.mime_type or "video/mp4",
+        )
+    file = message.document
+    return (
+        file.file_id,
+        file.file_unique_id,
+        file.file_name or f"file_{file.file_unique_id}",
+        file.mime_type or "application/octet-stream",
+    )
+
+
+async def _download_guarded(bot: Bot, file_id: str, suffix: str) -> Path:
+    """_download_to_temp capped by the shared download semaphore."""
+    async with _DOWNLOAD_SEMAPHORE:
+        return await _download_to_temp(bot, file_id, suffix)
+
+
+async def _save_telegram_media_group(messages: list[Message], state: FSMContext, bot: Bot):
+    """Download an album concurrently and save it with one bulk insert.
+
+    One handler run per album (see AlbumMiddleware): N downloads run
+    under a semaphore, the rows land in Postgres in a single commit and
+    the user gets one confirmation instead of N.
+    """
+    data = await state.get_data()
+    author_db_id = data.get("author_db_id")
+    if not author_db_id:
+        await messages[0].answer("❌ Пользователь не найден.")
+        return
+
+    infos = [_extract_file_info(m) for m in messages]
+    tmp_paths = await asyncio.gather(
+        *(
+            _download_guarded(bot, file_id, os.path.splitext(filename)[1] or "")
+            for file_id, _, filename, _ in infos
+        ),
+        return_exceptions=True,
+    )
+
+    items = []
+    failed = 0
+    for (file_id, file_unique_id, filename, mime_type), tmp_path in zip(infos, tmp_paths):
+        if isinstance(tmp_path, BaseException):
+            logger.warning(f"Failed to download album file {filename}: {tmp_path}")
+            failed += 1
+        else:
+            items.append((tmp_path, filename, mime_type, file_id, file_unique_id))
+
+    saved = []
+    if items:
+        async with get_db_context() as db:
+            saved = await MediaService(db).save_many(
+                items, uploader_id=UUID(author_db_id)
+            )
+    failed += len(items) - len(saved)
+
+    if not saved:
+        await messages[0].answer("❌ Не удалось сохранить файлы.")
+        return
+
+    media_ids = data.get("media_ids", [])
+    media_ids += [str(m.id) for m in saved]
+    await state.update_data(media_ids=media_ids)
+
+    failed_text = f", {failed} не удалось" if failed else ""
+    await messages[0].answer(
+        f"✅ Сохранено файлов: {len(saved)}{failed_text} (всего {len(media_ids)})\n\n"
+        "Отправьте ещё файлы или нажмите <b>Готово</b>.",
+        reply_markup=_MEDIA_DONE_KB,
+    )
+
+
 async def _save_telegram_media(
     message: Message,
     state: FSMContext,
     bot: Bot,
     media_type: str,
-    is_document: bool = False,
 ):
     """Download and save media from Telegram."""
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
+    file_id, file_unique_id, filename, mime_type = _extract_file_info(message)
 
-    # Get file info
-    if media_type == "image" and not is_document:
-        file = message.photo[-1]  # Largest size
-        file_id = file.file_id
-        filename = f"photo_{file.file_unique_id}.jpg"
-        mime_type = "image/jpeg"
-    elif media_type == "audio" and not is_document:
-        file = message.audio
-        file_id = file.file_id
-        filename = file.file_name or f"audio_{file.file_unique_id}.mp3"
-        mime_type = file.mime_type or "audio/mpeg"
-    elif media_type == "video" and not is_document:
-        file = message.video
-        file_id = file.file_id
-        filename = file.file_name or f"video_{file.file_unique_id}.mp4"
-        mime_type = file.mime_type or "video/mp4"
-    else:  # document
-        file = message.document
-        file_id = file.file_id
-        filename = file.file_name or f"file_{file.file_unique_id}"
-        mime_type = file.mime_type or "application/octet-stream"
-
-    # Download file
-    try:
-        tg_file = await bot.get_file(file_id)
-        file_bytes = io.BytesIO()
-        await bot.download_file(tg_file.file_path, file_bytes)
-        content = file_bytes.getvalue()
-    except Exception as e:
-        await message.answer(f"❌ Ошибка загрузки файла: {e}")
+    # Author id was cached in FSM data at /newpost time — no user lookup
+    data = await state.get_data()
+    author_db_id = data.get("author_db_id")
+    if not author_db_id:
+        await message.answer("❌ Пользователь не найден.")
         return
 
-    # Save to database
     async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(message.from_user.id)
+        media_service = MediaService(db)
 
-        if not user:
-            await message.answer("❌ Пользователь не найден.")
-            return
+        # Re-upload of a file we already stored? Reuse the row and skip
+        # both the Telegram download and the storage write.
+        media = await media_service.find_reusable(
+            file_unique_id, UUID(author_db_id)
+        )
 
-        media_service = MediaService(db)
-        try:
-            media = await media_service.save_from_bytes(
-                content=content,
-                filename=filename,
-                mime_type=mime_type,
-                uploader_id=user.id,
-                telegram_file_id=file_id,
-            )
+        if media is None:
+            # Stream file to disk — never hold the blob in memory
+            try:
+                tmp_path = await _download_to_temp(
+                    bot, file_id, os.path.splitext(filename)[1] or ""
+                )
+            except Exception as e:
+                await message.answer(f"❌ Ошибка загрузки файла: {e}")
+                return
 
-            # Add to state
-            data = await state.get_data()
-            media_ids = data.get("media_ids", [])
-            media_ids.append(str(media.id))
-            await state.update_data(media_ids=media_ids)
-
-            # Show confirmation with Done button
-            media_type_labels = {
-                "image": "Фото",
-                "audio": "Аудио",
-                "video": "Видео",
-                "document": "Документ",
-            }
-            type_label = media_type_labels.get(media_type, "Файл")
-
-            builder = InlineKeyboardBuilder()
-            builder.button(text="✅ Готово - Создать пост", callback_data="media_done")
-            builder.adjust(1)
-
-            await message.answer(
-                f"✅ {type_label} сохранено! (всего {len(media_ids)} файлов)\n\n"
-                "Отправьте ещё файлы или нажмите <b>Готово</b>.",
-                reply_markup=builder.as_markup(),
-            )
-        except ValueError as e:
-            await message.answer(f"❌ Ошибка: {e}")
+            try:
+                media = await media_service.save_from_path(
+                    tmp_path,
+                    filename=filename,
+                    mime_type=mime_type,
+                    uploader_id=UUID(author_db_id),
+                    telegram_file_id=file_id,
+                    telegram_unique_id=file_unique_id,
+                )
+            except ValueError as e:
+                await message.answer(f"❌ Ошибка: {e}")
+                return
+
+        # Add to state
+        media_ids = data.get("media_ids", [])
+        media_ids.append(str(media.id))
+        await state.update_data(media_ids=media_ids)
+
+        # Show confirmation with Done button
+        media_type_labels = {
+            "image": "Фото",
+            "audio": "Аудио",
+            "video": "Видео",
+            "document": "Документ",
+        }
+        type_label = media_type_labels.get(media_type, "Файл")
+
+        await message.answer(
+            f"✅ {type_label} сохранено! (всего {len(media_ids)} файлов)\n\n"
+            "Отправьте ещё файлы или нажмите <b>Готово</b>.",
+            reply_markup=_MEDIA_DONE_KB,
+        )
 
 
-@router.callback_query(F.data == "media_done", PostCreation.waiting_for_media)
-@router.callback_query(F.data == "media_skip", PostCreation.waiting_for_media)
 async def process_media_done(callback: CallbackQuery, state: FSMContext):
     """Finish media upload and ask about visibility or publishing."""
-    from aiogram.exceptions import TelegramBadRequest
 
     data = await state.get_data()
     post_type = data.get("post_type")
@@ -820,69 +953,69 @@ async def process_media_done(callback: CallbackQuery, state: FSMContext):
     # For photo posts, go to visibility selection first (they skipped it earlier)
     if post_type == "photo":
         await _show_visibility_keyboard(callback.message, state, edit=False)
-        try:
-            await callback.answer()
-        except TelegramBadRequest:
-            pass
+        _ack_callback_later(callback)
         return
 
     # For other post types, go straight to publish choice
     await state.set_state(PostCreation.waiting_for_publish_choice)
 
-    builder = InlineKeyboardBuilder()
-    builder.button(text="🚀 Опубликовать сейчас", callback_data="publish_now")
-    builder.button(text="📝 Сохранить как черновик", callback_data="publish_draft")
-    builder.adjust(1)
-
-    try:
-        await callback.message.edit_text(
-            "📄 <b>Последний шаг</b>\n\n"
-            "Выберите действие:",
-            reply_markup=builder.as_markup(),
-        )
-    except TelegramBadRequest:
-        await callback.message.answer(
-            "📄 <b>Последний шаг</b>\n\n"
-            "Выберите действие:",
-            reply_markup=builder.as_markup(),
-        )
+    await _edit_or_send(
+        callback.message,
+        "📄 <b>Последний шаг</b>\n\n"
+        "Выберите действие:",
+        reply_markup=_PUBLISH_CHOICE_KB,
+    )
 
-    try:
-        await callback.answer()
-    except TelegramBadRequest:
-        pass
+    _ack_callback_later(callback)
 
 
-@router.callback_query(F.data.in_({"publish_now", "publish_draft"}), PostCreation.waiting_for_publish_choice)
 async def process_publish_choice(callback: CallbackQuery, state: FSMContext):
     """Create post with chosen status."""
     data = await state.get_data()
     publish_now = callback.data == "publish_now"
     await state.clear()
 
-    from src.services.post import PostService
-    from src.services.media import MediaService
-    from src.db.session import get_db_context
-    from uuid import UUID
+    # Resolve transcribed content stored out-of-band (see _CONTENT_REF_TTL)
+    content = data.get("content", "")
+    content_ref = data.get("content_ref")
 
-    async with get_db_context() as db:
-        auth_service = AuthService(db)
-        user = await auth_service.get_user_by_telegram_id(callback.from_user.id)
-
-        if not user:
-            await callback.message.edit_text("❌ Пользователь не найден.")
-            return
+    # If the background format pass is still running, wait for it so the
+    # published text is the formatted version (it also refreshes Redis)
+    pending = _format_tasks.pop(callback.from_user.id, None)
+    if pending is not None:
+        task_ref, fmt_task = pending
+        if task_ref == content_ref:
+            try:
+                content = await fmt_task
+            except Exception as e:
+                logger.warning(f"Format task failed: {e}")
+        else:
+            fmt_task.cancel()  # Task belongs to an abandoned draft
 
-        from src.db.models.post import PostVisibility, PostStatus, PostType
+    if content_ref:
+        try:
+            value = await cache_get(content_ref)
+            if value is not None:
+                content = value
+            await cache_delete(content_ref)
+        except Exception:
+            pass  # Non-critical: fall back to inline content
+    content = _lazy_strip(content)
+
+    # Author id was cached in FSM data at /newpost time — no user lookup
+    author_db_id = data.get("author_db_id")
+    if not author_db_id:
+        await callback.message.edit_text("❌ Пользователь не найден.")
+        return
+    author_id = UUID(author_db_id)
 
+    async with get_db_context() as db:
         # Determine title — for photo posts it's optional
         post_type = data.get("post_type", "text")
-        title = data.get("title", "").strip()
-        content = data.get("content", "").strip()
+        title = _lazy_strip(data.get("title", ""))
 
         if not title:
             # Auto-generate title from date
-            from datetime import datetime
             title = f"Фото {datetime.now().strftime('%d.%m.%Y %H:%M')}"
 
         # Photo posts from bot → PHOTO type, text/voice → ARTICLE
@@ -890,7 +1023,7 @@ async def process_publish_choice(callback: CallbackQuery, state: FSMContext):
 
         post_service = PostService(db)
         post = await post_service.create_post(
-            author_id=user.id,
+            author_id=author_id,
             title=title,
             content_md=content or "",
             visibility=PostVisibility(data.get("visibility", "public")),
@@ -901,39 +1034,34 @@ async def process_publish_choice(callback: CallbackQuery, state: FSMContext):
         if publish_now:
             post = await post_service.publish_post(post.id)
             status_text = "Опубликован"
-            # Send notifications
-            from src.services.notification import notify_post_published
-            await notify_post_published(db, post)
+            # Broadcasting to subscribers is one Telegram send per user;
+            # don't make the author's confirmation wait for it
+            notify_task = asyncio.create_task(_safe_notify(post.id))
+            _notify_tasks.add(notify_task)
+            notify_task.add_done_callback(_notify_tasks.discard)
         else:
             status_text = "Черновик"
 
         media_service = MediaService(db)
 
-        # Attach original voice/video if requested (already saved earlier)
+        # Attach original voice/video (sort_order 0) plus additional
+        # media in upload order — one bulk UPDATE instead of 2N awaits
+        ordered = []
         if data.get("save_original_audio") and data.get("voice_media_id"):
-            voice_media_uuid = UUID(data["voice_media_id"])
-            await media_service.attach_to_post(voice_media_uuid, post.id, user.id)
-            await media_service.update_sort_order(voice_media_uuid, 0)
-
-        # Attach additional media to post
+            ordered.append((UUID(data["voice_media_id"]), 0))
         media_ids = data.get("media_ids", [])
-        first_image_id = None
-        if media_ids:
-            start_idx = 1 if data.get("save_original_audio") and data.get("voice_media_id") else 0
-            for idx, mid in enumerate(media_ids):
-                await media_service.attach_to_post(UUID(mid), post.id, user.id)
-                await media_service.update_sort_order(UUID(mid), start_idx + idx)
-                # Track first image for cover
-                if first_image_id is None:
-                    media_item = await media_service.get_by_id(UUID(mid))
-                    if media_item and media_item.media_type.value == "image":
-                        first_image_id = UUID(mid)
+        start_idx = len(ordered)
+        ordered += [(UUID(mid), start_idx + idx) for idx, mid in enumerate(media_ids)]
+        await media_service.attach_many(post.id, author_id, ordered)
 
         # Set first image as cover for photo posts
-        if post_type == "photo" and first_image_id:
-            await post_service.update_post(post.id, cover_image_id=first_image_id)
+        if post_type == "photo" and media_ids:
+            first_image_id = await media_service.first_image_id(
+                [UUID(mid) for mid in media_ids]
+            )
+            if first_image_id:
+                await post_service.update_post(post.id, cover_image_id=first_image_id)
 
-        from src.config import settings
         post_url = f"{settings.base_url}/posts/{post.slug}"
 
         # Build status message
@@ -944,54 +1072,76 @@ async def process_publish_choice(callback: CallbackQuery, state: FSMContext):
             extras.append(f"{len(media_ids)} файл(ов)")
         media_text = f"\nМедиа: {', '.join(extras)}" if extras else ""
 
-        from aiogram.exceptions import TelegramBadRequest
-
-        try:
-            await callback.message.edit_text(
-                f"✅ <b>Пост создан!</b>\n\n"
-                f"📝 {post.title}\n"
-                f"👁 Видимость: {data.get('visibility', 'public')}\n"
-                f"📄 Статус: {status_text}{media_text}\n\n"
-                f"<a href='{post_url}'>Открыть пост</a>"
-            )
-        except TelegramBadRequest:
-            await callback.message.answer(
-                f"✅ <b>Пост создан!</b>\n\n"
-                f"📝 {post.title}\n"
-                f"👁 Видимость: {data.get('visibility', 'public')}\n"
-                f"📄 Статус: {status_text}{media_text}\n\n"
-                f"<a href='{post_url}'>Открыть пост</a>"
-            )
+        await _edit_or_send(
+            callback.message,
+            _POST_CREATED_TMPL.format(
+                title=post.title,
+                visibility=data.get("visibility", "public"),
+                status=status_text,
+                media=media_text,
+                url=post_url,
+            ),
+        )
 
-    try:
-        await callback.answer()
-    except TelegramBadRequest:
-        pass  # Query timeout - ignore
+    _ack_callback_later(callback)
 
 
 # ============= FALLBACK HANDLER =============
-# Must be at the END so it only catches callbacks that weren't handled by specific handlers
 
-@router.callback_query(F.data.in_({"media_done", "media_skip", "publish_now", "publish_draft"}))
-@router.callback_query(F.data.startswith("vis_"))
-@router.callback_query(F.data.startswith("audio_save_"))
-@router.callback_query(F.data.startswith("post_type_"))
 async def handle_stale_callback(callback: CallbackQuery):
     """Handle callbacks when state is lost (e.g., after bot restart)."""
-    from aiogram.exceptions import TelegramBadRequest
 
     logger.warning(f"Stale callback from user {callback.from_user.id}: {callback.data}")
 
-    try:
-        await callback.message.edit_text(
-            "⚠️ Сессия устарела. Пожалуйста, начните заново с /newpost"
-        )
-    except TelegramBadRequest:
-        await callback.message.answer(
-            "⚠️ Сессия устарела. Пожалуйста, начните заново с /newpost"
-        )
+    await _edit_or_send(
+        callback.message,
+        "⚠️ Сессия устарела. Пожалуйста, начните заново с /newpost",
+    )
+    _ack_callback_later(callback, "Сессия устарела")
+
+
+# ============= CALLBACK DISPATCH =============
+# A single catch-all handler with one dict probe replaces evaluating
+# every registered filter chain against every callback. Values are the
+# FSM state the callback is valid in plus the handler; a state mismatch
+# means the draft was lost (e.g. bot restart) and routes to
+# handle_stale_callback, matching the old fallback registrations.
+
+_CB_EXACT_ROUTES = {
+    "media_done": (PostCreation.waiting_for_media.state, process_media_done),
+    "media_skip": (PostCreation.waiting_for_media.state, process_media_done),
+    "publish_now": (PostCreation.waiting_for_publish_choice.state, process_publish_choice),
+    "publish_draft": (PostCreation.waiting_for_publish_choice.state, process_publish_choice),
+}
+_CB_PREFIX_ROUTES = (
+    ("post_type_", PostCreation.waiting_for_type.state, process_post_type),
+    ("audio_save_", PostCreation.confirm_save_audio.state, process_audio_save_choice),
+    ("vis_", PostCreation.waiting_for_visibility.state, process_visibility),
+)
+
+
+@router.callback_query()
+async def dispatch_callback(
+    callback: CallbackQuery, state: FSMContext, raw_state: Optional[str] = None
+):
+    """Route post-creation callbacks through a single lookup table."""
+    data = callback.data or ""
+
+    route = _CB_EXACT_ROUTES.get(data)
+    if route is None:
+        for prefix, expected_state, handler in _CB_PREFIX_ROUTES:
+            if data.startswith(prefix):
+                route = (expected_state, handler)
+                break
+    if route is None:
+        # Not a post-creation callback — same as having no matching handler
+        return
 
-    try:
-        await callback.answer("Сессия устарела")
-    except TelegramBadRequest:
-        pass
+    expected_state, handler = route
+    # raw_state is resolved once per update by aiogram's FSM middleware,
+    # so this check costs no extra Redis round-trip
+    if raw_state != expected_state:
+        await handle_stale_callback(callback)
+        return
+
+    await handler(callback, state)
@@ -1,22 +1,60 @@
 """Bot instance - separated to avoid circular imports."""
 
+from typing import Optional
+
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
+from src.bot.throttling import RateLimitMiddleware
 from src.config import settings
 
-# Create session for local API server if configured
-session = None
-if settings.telegram_api_server:
-    api = TelegramAPIServer.from_base(settings.telegram_api_server, is_local=True)
-    session = AiohttpSession(api=api)
-
-# Create bot instance
-bot = Bot(
-    token=settings.telegram_bot_token,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    session=session,
-)
+def create_bot_session() -> AiohttpSession:
+    """Build the Telegram HTTP session with a tuned connection pool.
+
+    aiogram only exposes the total connection ``limit`` directly; the
+    remaining connector knobs go through the init dict it applies when
+    the session is first used. Keep-alive plus a per-host cap let
+    concurrent file downloads reuse warm TLS connections to the API
+    host instead of paying a handshake per file.
+    """
+    kwargs = {}
+    if settings.telegram_api_server:
+        kwargs["api"] = TelegramAPIServer.from_base(
+            settings.telegram_api_server, is_local=True
+        )
+    session = AiohttpSession(limit=50, **kwargs)
+    session._connector_init.update(
+        limit_per_host=20,
+        keepalive_timeout=60,
+        enable_cleanup_closed=True,
+    )
+    return session
+
+
+_bot: Optional[Bot] = None
+
+
+def _build_bot() -> Bot:
+    bot = Bot(
+        token=settings.telegram_bot_token,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        session=create_bot_session(),
+    )
+    # Keep outbound sends below Telegram's rate limits (see src/bot/throttling.py)
+    bot.session.middleware(RateLimitMiddleware())
+    return bot
+
+
+def __getattr__(name: str) -> Bot:
+    # PEP 562: the bot is built on first attribute access, so entry
+    # points that only need config/models (alembic, scripts, tests)
+    # don't construct a Bot and its session during import
+    if name == "bot":
+        global _bot
+        if _bot is None:
+            _bot = _build_bot()
+        return _bot
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
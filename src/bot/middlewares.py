@@ -0,0 +1,64 @@
+"""Dispatcher middlewares shared by bot routers."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+from src.db.session import get_db_context
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Provide one DB session per update as ``data["db"]``.
+
+    Handlers that previously opened their own ``get_db_context`` blocks
+    share a single session (and thus at most one pool checkout) per
+    update. AsyncSession is lazy — no connection is acquired until the
+    first statement, so updates that never touch the DB stay free.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with get_db_context() as db:
+            data["db"] = db
+            return await handler(event, data)
+
+
+class AlbumMiddleware(BaseMiddleware):
+    """Aggregate media-group (album) messages into one handler call.
+
+    Telegram delivers an album of N files as N separate messages that
+    share a ``media_group_id``. The first message of a group waits a
+    short window for its siblings, then reaches the handler with the
+    full batch as ``data["album"]``; the rest are swallowed here. So
+    one album costs one handler run instead of N.
+    """
+
+    def __init__(self, wait: float = 1.0):
+        self.wait = wait
+        self._albums: dict[str, list[Message]] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        group_id = getattr(event, "media_group_id", None)
+        if not group_id:
+            return await handler(event, data)
+
+        album = self._albums.setdefault(group_id, [])
+        album.append(event)
+        if len(album) > 1:
+            return None  # The first message's task delivers the batch
+
+        await asyncio.sleep(self.wait)
+        data["album"] = self._albums.pop(group_id)
+        return await handler(event, data)
@@ -0,0 +1,58 @@
+"""FSM storage that keeps state and data in one Redis hash per user."""
+
+from collections.abc import Mapping
+from typing import Any, Optional, cast
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+
+class HashRedisStorage(RedisStorage):
+    """RedisStorage variant with a single hash per chat/user.
+
+    Stock RedisStorage uses separate ``:state`` and ``:data`` string keys,
+    so a handler dispatch costs two GETs plus two SETs. Storing both as
+    fields of one hash keeps reads to one round-trip each and lets writes
+    pipeline the field update together with the TTL refresh.
+    """
+
+    def _hash_key(self, key: StorageKey) -> str:
+        return self.key_builder.build(key, "hash")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        redis_key = self._hash_key(key)
+        if state is None:
+            await self.redis.hdel(redis_key, "state")
+            return
+        value = cast(str, state.state if isinstance(state, State) else state)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(redis_key, "state", value)
+            if self.state_ttl:
+                pipe.expire(redis_key, self.state_ttl)
+            await pipe.execute()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        value = await self.redis.hget(self._hash_key(key), "state")
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return cast(Optional[str], value)
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        redis_key = self._hash_key(key)
+        if not data:
+            await self.redis.hdel(redis_key, "data")
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(redis_key, "data", self.json_dumps(dict(data)))
+            if self.data_ttl:
+                pipe.expire(redis_key, self.data_ttl)
+            await pipe.execute()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value = await self.redis.hget(self._hash_key(key), "data")
+        if value is None:
+            return {}
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return cast(dict[str, Any], self.json_loads(value))
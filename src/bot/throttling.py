@@ -0,0 +1,87 @@
+"""Outbound Telegram API rate limiting.
+
+Telegram enforces roughly 30 messages/second globally and 20 messages/
+minute per chat. Exceeding either yields HTTP 429 with a retry_after,
+and naive retries amplify the overload. This session middleware applies
+admission control before every chat-bound API call and honors
+TelegramRetryAfter by sleeping out the penalty and retrying once.
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+GLOBAL_RATE = 30  # calls per GLOBAL_PERIOD
+GLOBAL_PERIOD = 1.0  # seconds
+CHAT_RATE = 20  # calls per CHAT_PERIOD
+CHAT_PERIOD = 60.0  # seconds
+_MAX_TRACKED_CHATS = 10_000
+
+
+class SlidingWindowLimiter:
+    """Allow at most ``max_rate`` acquisitions per ``time_period`` seconds.
+
+    Waiters queue FIFO on the internal lock, so bursts are smoothed
+    instead of rejected.
+    """
+
+    __slots__ = ("max_rate", "time_period", "_timestamps", "_lock")
+
+    def __init__(self, max_rate: int, time_period: float):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._timestamps: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.time_period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.max_rate:
+                    self._timestamps.append(now)
+                    return
+                await asyncio.sleep(self.time_period - (now - self._timestamps[0]))
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Throttle chat-bound API calls below Telegram's published limits."""
+
+    def __init__(self) -> None:
+        self._global = SlidingWindowLimiter(GLOBAL_RATE, GLOBAL_PERIOD)
+        self._per_chat: dict[int | str, SlidingWindowLimiter] = defaultdict(
+            lambda: SlidingWindowLimiter(CHAT_RATE, CHAT_PERIOD)
+        )
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # getUpdates, answerCallbackQuery etc. — not message sends
+            return await make_request(bot, method)
+
+        if len(self._per_chat) >= _MAX_TRACKED_CHATS:
+            self._per_chat.clear()
+
+        await self._global.acquire()
+        await self._per_chat[chat_id].acquire()
+
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            return await make_request(bot, method)
@@ -1,25 +1,80 @@
-from fastapi import APIRouter, Request, HTTPException
+import asyncio
+import hmac
+import logging
+
+from aiogram.types import Update
+from fastapi import APIRouter, HTTPException, Request
 
 from src.bot.bot import bot, dp
 from src.config import settings
+from src.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Raw update payloads are buffered here and drained by the background
+# consumers started from the app lifespan
+_UPDATE_QUEUE_KEY = "tg:updates"
+_CONSUMER_COUNT = 2
+
+# Telegram updates are a few KB; anything bigger is not Telegram
+_MAX_UPDATE_BODY = 65536
+
 
 @router.post("/webhook/telegram/{secret}")
 async def telegram_webhook(secret: str, request: Request):
-    """Handle Telegram webhook updates."""
-    # Verify secret
-    if settings.telegram_webhook_secret and secret != settings.telegram_webhook_secret:
-        raise HTTPException(status_code=403, detail="Invalid webhook secret")
+    """Accept a Telegram update and queue it for processing.
 
-    # Get update data
-    update_data = await request.json()
+    Telegram's sender only needs the 200; handling the update inline
+    would hold its connection through every DB write and outbound API
+    call. Queueing makes the response a single Redis RTT and lets the
+    consumers work updates in parallel.
+    """
+    # Verify secret (constant-time) before touching the body
+    if settings.telegram_webhook_secret and not hmac.compare_digest(
+        secret, settings.telegram_webhook_secret
+    ):
+        raise HTTPException(status_code=403, detail="Invalid webhook secret")
 
-    # Process update
-    from aiogram.types import Update
+    # Reject oversized bodies without reading them
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > _MAX_UPDATE_BODY:
+        raise HTTPException(status_code=413, detail="Payload too large")
 
-    update = Update.model_validate(update_data, context={"bot": bot})
-    await dp.feed_update(bot, update)
+    body = await request.body()
+    try:
+        redis = await get_redis()
+        await redis.lpush(_UPDATE_QUEUE_KEY, body.decode())
+    except Exception as e:
+        # Redis down — process inline so the update isn't dropped
+        logger.warning(f"Update queue unavailable, processing inline: {e}")
+        update = Update.model_validate_json(body, context={"bot": bot})
+        await dp.feed_update(bot, update)
 
     return {"ok": True}
+
+
+async def _consume_updates() -> None:
+    """BRPOP loop: validate queued updates and feed the dispatcher."""
+    redis = await get_redis()
+    while True:
+        try:
+            item = await redis.brpop(_UPDATE_QUEUE_KEY, timeout=5)
+            if item is None:
+                continue
+            _, raw = item
+            update = Update.model_validate_json(raw, context={"bot": bot})
+            await dp.feed_update(bot, update)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to process queued update: {e}")
+
+
+def start_update_consumers(count: int = _CONSUMER_COUNT) -> list[asyncio.Task]:
+    """Spawn the update consumer tasks (called from the app lifespan)."""
+    return [
+        asyncio.create_task(_consume_updates(), name=f"tg-update-consumer-{i}")
+        for i in range(count)
+    ]
@@ -1,3 +1,4 @@
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -5,10 +6,13 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    # frozen: settings are read-only after startup, so pydantic skips
+    # assignment validation and the instance is safely shared everywhere
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
         extra="ignore",
+        frozen=True,
     )
 
     # Application
@@ -46,7 +50,7 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
-    @property
+    @cached_property
     def async_database_url(self) -> str:
         url = self.database_url
         if url.startswith("postgresql://"):
@@ -54,4 +58,10 @@ class Settings(BaseSettings):
         return url
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build Settings once per process — env files are only re-read here."""
+    return Settings()
+
+
+settings = get_settings()
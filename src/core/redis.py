@@ -10,14 +10,40 @@ redis_client: Optional[Redis] = None
 async def get_redis() -> Redis:
     global redis_client
     if redis_client is None:
+        # hiredis (installed via redis[hiredis]) is picked up
+        # automatically for C-speed reply parsing. Keepalive + health
+        # checks keep pooled connections from dying silently under idle.
         redis_client = from_url(
             settings.redis_url,
             encoding="utf-8",
             decode_responses=True,
+            max_connections=50,
+            socket_keepalive=True,
+            health_check_interval=30,
+            client_name="webseit-app",
         )
     return redis_client
 
 
+async def cache_get(key: str) -> Optional[str]:
+    """Read a cached value (None on miss)."""
+    redis = await get_redis()
+    return await redis.get(key)
+
+
+async def cache_set(key: str, value: str, ttl: int = 300) -> None:
+    """Write a cached value. TTL is mandatory so entries always expire —
+    cache keys must never grow Redis without bound."""
+    redis = await get_redis()
+    await redis.set(key, value, ex=ttl)
+
+
+async def cache_delete(key: str) -> None:
+    """Drop a cached value (no-op if absent)."""
+    redis = await get_redis()
+    await redis.delete(key)
+
+
 async def close_redis() -> None:
     global redis_client
     if redis_client is not None:
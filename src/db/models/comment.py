@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,6 +15,19 @@ if TYPE_CHECKING:
 
 class Comment(Base, TimestampMixin):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index(
+            "ix_comments_post_approved_created",
+            "post_id", "is_approved", "created_at",
+        ),
+        # Partial: the moderation queue only scans unapproved rows, a
+        # tiny fraction of the table once most comments are approved
+        Index(
+            "ix_comments_pending",
+            text("created_at DESC"),
+            postgresql_where=text("is_approved = false"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
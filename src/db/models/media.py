@@ -39,8 +39,11 @@ class Media(Base):
         nullable=True,
     )
 
+    # native_enum=False: VARCHAR + CHECK (see Post for rationale)
     media_type: Mapped[MediaType] = mapped_column(
-        Enum(MediaType, name="media_type"), nullable=False
+        Enum(MediaType, name="media_type", native_enum=False,
+             length=16, create_constraint=True),
+        nullable=False,
     )
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     original_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -51,6 +54,11 @@ class Media(Base):
 
     # Telegram reference
     telegram_file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Stable across re-uploads/forwards of the same file — used to skip
+    # re-downloading bytes we already have
+    telegram_unique_id: Mapped[Optional[str]] = mapped_column(
+        String(100), nullable=True, index=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, Optional
 
 from sqlalchemy import (
     Boolean,
+    Computed,
     DateTime,
     Enum,
     ForeignKey,
@@ -60,25 +61,40 @@ class Post(Base, TimestampMixin):
     content_blocks: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     excerpt: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
 
+    # native_enum=False: VARCHAR + CHECK instead of Postgres enum types —
+    # same bytes on disk for short labels, no ALTER TYPE to add variants
     visibility: Mapped[PostVisibility] = mapped_column(
-        Enum(PostVisibility, name="post_visibility"),
+        Enum(PostVisibility, name="post_visibility", native_enum=False,
+             length=16, create_constraint=True),
         default=PostVisibility.PUBLIC,
         nullable=False,
     )
     status: Mapped[PostStatus] = mapped_column(
-        Enum(PostStatus, name="post_status"),
+        Enum(PostStatus, name="post_status", native_enum=False,
+             length=16, create_constraint=True),
         default=PostStatus.DRAFT,
         nullable=False,
     )
     post_type: Mapped[PostType] = mapped_column(
-        Enum(PostType, name="post_type"),
+        Enum(PostType, name="post_type", native_enum=False,
+             length=16, create_constraint=True),
         default=PostType.ARTICLE,
         nullable=False,
         server_default="ARTICLE",
     )
 
     view_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
-    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True)
+    # Generated column: Postgres maintains the tsvector on every write,
+    # so the services never issue a separate vector UPDATE
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(title, '') || ' ' "
+            "|| coalesce(content_md, ''))",
+            persisted=True,
+        ),
+        nullable=True,
+    )
     published_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
@@ -100,34 +116,52 @@ class Post(Base, TimestampMixin):
         ForeignKey("media.id", ondelete="SET NULL"),
         nullable=True,
     )
+    # Denormalized path of the cover (or first attached image), kept
+    # current by MediaService.refresh_featured_image — lets list views
+    # render thumbnails without loading the media relationship
+    featured_image_path: Mapped[Optional[str]] = mapped_column(
+        String(500), nullable=True
+    )
 
-    # Relationships
+    # Relationships. raise_on_sql: list queries must not fan out into
+    # media/comments loads — call sites that render relationships opt in
+    # with selectinload. passive_deletes lets the FK ON DELETE CASCADE
+    # remove children without loading them first.
     author: Mapped[Optional["User"]] = relationship(
-        "User", back_populates="posts", lazy="selectin"
+        "User", back_populates="posts", lazy="raise_on_sql"
     )
     media: Mapped[list["Media"]] = relationship(
-        "Media", back_populates="post", lazy="selectin", cascade="all, delete-orphan",
+        "Media", back_populates="post", lazy="raise_on_sql",
+        cascade="all, delete-orphan", passive_deletes=True,
         foreign_keys="Media.post_id"
     )
     comments: Mapped[list["Comment"]] = relationship(
-        "Comment", back_populates="post", lazy="selectin", cascade="all, delete-orphan"
+        "Comment", back_populates="post", lazy="raise_on_sql",
+        cascade="all, delete-orphan", passive_deletes=True
     )
     cover_image: Mapped[Optional["Media"]] = relationship(
-        "Media", foreign_keys=[cover_image_id], lazy="selectin"
+        "Media", foreign_keys=[cover_image_id], lazy="raise_on_sql"
     )
 
     @property
     def featured_image(self) -> Optional[str]:
-        """Get cover image URL or first image from media."""
-        if self.cover_image:
-            return f"/uploads/{self.cover_image.file_path}"
-        # Fallback to first image in media
-        for m in self.media:
-            if m.media_type.value == "image":
-                return f"/uploads/{m.file_path}"
+        """Cover image URL (denormalized — no relationship traversal)."""
+        if self.featured_image_path:
+            return f"/uploads/{self.featured_image_path}"
         return None
 
     __table_args__ = (
         Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
-        Index("ix_posts_visibility_status", "visibility", "status", "published_at"),
+        # Covering index for the feed query: equality columns first
+        # (status, visibility), then the sort keys; INCLUDE carries the
+        # card fields so a 20-row page is an index-only scan. A backward
+        # btree scan serves the DESC ordering.
+        Index(
+            "ix_posts_feed",
+            "status",
+            "visibility",
+            "is_pinned",
+            "published_at",
+            postgresql_include=["id", "title", "slug", "excerpt", "featured_image_path"],
+        ),
     )
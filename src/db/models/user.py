@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Enum, ForeignKey, Integer, String, Text, func
+from sqlalchemy import BigInteger, Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,6 +24,24 @@ class AccessLevel(enum.IntEnum):
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination scans (created_at, id) as a range
+        Index("ix_users_created_id", "created_at", "id"),
+        # pg_trgm GIN indexes serve the admin search's leading-wildcard
+        # ILIKE, which a btree cannot (extension created in migration)
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_display_name_trgm",
+            "display_name",
+            postgresql_using="gin",
+            postgresql_ops={"display_name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -33,8 +51,11 @@ class User(Base, TimestampMixin):
     )
     username: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     display_name: Mapped[str] = mapped_column(String(128), nullable=False)
+    # native_enum=False: plain VARCHAR + CHECK instead of a Postgres
+    # enum type, so adding a level is a constraint swap, not ALTER TYPE
     access_level: Mapped[AccessLevel] = mapped_column(
-        Enum(AccessLevel, name="access_level"),
+        Enum(AccessLevel, name="access_level", native_enum=False,
+             length=16, create_constraint=True),
         default=AccessLevel.REGISTERED,
         nullable=False,
     )
@@ -51,12 +72,15 @@ class User(Base, TimestampMixin):
         DateTime(timezone=True), nullable=True
     )
 
-    # Relationships
+    # Relationships. posts/comments are raise_on_sql: nothing renders
+    # them from the user side, and eager-loading every authored row on
+    # the per-request user lookup was pure overhead. passive_deletes
+    # defers cleanup to the FK actions instead of loading collections.
     posts: Mapped[list["Post"]] = relationship(
-        "Post", back_populates="author", lazy="selectin"
+        "Post", back_populates="author", lazy="raise_on_sql", passive_deletes=True
     )
     comments: Mapped[list["Comment"]] = relationship(
-        "Comment", back_populates="author", lazy="selectin"
+        "Comment", back_populates="author", lazy="raise_on_sql", passive_deletes=True
     )
     achievements: Mapped[list["Achievement"]] = relationship(
         "Achievement", back_populates="user", lazy="selectin"
@@ -65,10 +89,20 @@ class User(Base, TimestampMixin):
 
 class AuthCode(Base):
     __tablename__ = "auth_codes"
+    __table_args__ = (
+        # Partial: only unconsumed codes are ever looked up, so the
+        # index stays tiny no matter how many historical rows accumulate
+        Index(
+            "ix_auth_codes_active",
+            "code",
+            postgresql_where=text("used = false"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
+    # Codes are generated uppercase, so lookups can use plain equality
     code: Mapped[str] = mapped_column(String(8), nullable=False)
     telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
     expires_at: Mapped[datetime] = mapped_column(
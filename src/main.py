@@ -1,10 +1,11 @@
+import asyncio
+import re
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -27,6 +28,16 @@ settings.upload_dir.mkdir(parents=True, exist_ok=True)
 async def lifespan(app: FastAPI):
     # Startup
     await get_redis()
+    # Seed the Redis admin set so bot handlers can authorize without DB hits
+    try:
+        from src.db.session import get_db_context
+        from src.services.admin_cache import seed_admin_set
+
+        async with get_db_context() as db:
+            await seed_admin_set(db)
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning(f"Failed to seed admin cache: {e}")
     # Create arq pool for enqueueing background tasks
     try:
         from arq.connections import RedisSettings, create_pool
@@ -36,10 +47,41 @@ async def lifespan(app: FastAPI):
         import logging
         logging.getLogger(__name__).warning(f"Failed to create arq pool: {e}")
         app.state.arq_pool = None
+    # Drain queued Telegram updates in the background (see src/bot/webhook.py)
+    from src.bot.webhook import start_update_consumers
+
+    update_consumers = start_update_consumers()
+    # Periodic bulk flush of buffered post view counts
+    from src.services.post import flush_view_counts, start_view_flush_task
+
+    view_flush_task = start_view_flush_task()
     yield
     # Shutdown
+    view_flush_task.cancel()
+    for task in update_consumers:
+        task.cancel()
+    await asyncio.gather(view_flush_task, *update_consumers, return_exceptions=True)
+    # Best-effort final flush so buffered views survive restarts
+    try:
+        await flush_view_counts()
+    except Exception:
+        pass
     if getattr(app.state, "arq_pool", None):
         await app.state.arq_pool.close()
+    # Close the shared Telegram session pool (webhook/bot helpers)
+    try:
+        from src.bot.instance import bot
+
+        await bot.session.close()
+    except Exception:
+        pass
+    # Close the shared OpenAI HTTP client (transcription)
+    try:
+        from src.services.transcription import close_client
+
+        await close_client()
+    except Exception:
+        pass
     await close_redis()
 
 
@@ -49,6 +91,7 @@ app = FastAPI(
     docs_url="/api/docs" if settings.debug else None,
     redoc_url="/api/redoc" if settings.debug else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson is much faster than json.dumps
 )
 
 # Rate limiter state
@@ -89,17 +132,27 @@ async def add_security_headers(request: Request, call_next):
     )
     return response
 
-# Static files
+# Static files. Content-hashed names (admin avatar uploads) get a unique
+# filename per content, so browsers may cache them forever.
+_HASHED_NAME_RE = re.compile(r"-[0-9a-f]{16}\.[a-z0-9]+$")
+
+
+class HashedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _HASHED_NAME_RE.search(str(full_path)):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
 static_path = Path(__file__).parent.parent / "static"
 if static_path.exists():
-    app.mount("/static", StaticFiles(directory=static_path), name="static")
+    app.mount("/static", HashedStaticFiles(directory=static_path), name="static")
 
 # Uploaded media
 app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
 
 # Templates
-templates_path = Path(__file__).parent.parent / "templates"
-templates = Jinja2Templates(directory=templates_path)
 
 
 # Health check
@@ -20,6 +20,20 @@ class MediaUploadResponse(BaseModel):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_media(cls, media, url: str) -> "MediaUploadResponse":
+        """Build from a Media row; skips validation of trusted DB data."""
+        return cls.model_construct(
+            id=media.id,
+            filename=media.filename,
+            original_name=media.original_name,
+            media_type=media.media_type.value,
+            file_size=media.file_size,
+            mime_type=media.mime_type,
+            url=url,
+            created_at=media.created_at,
+        )
+
 
 class MediaListResponse(BaseModel):
     """List of media items."""
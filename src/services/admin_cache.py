@@ -0,0 +1,71 @@
+"""Redis-backed set of admin telegram_ids.
+
+Admin-gated bot callbacks only need a boolean, but each check cost a
+full users-table SELECT. The admin set lives in Redis (SISMEMBER is one
+round-trip and skips the Postgres pool); it is seeded from Postgres at
+startup and kept fresh by the writers that flip is_admin. Every helper
+degrades to "cache unavailable" so callers can fall back to the DB.
+"""
+
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.redis import get_redis
+from src.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+ADMIN_SET_KEY = "admins:telegram_ids"
+# Marker distinguishing "empty set" from "never seeded"; its TTL forces
+# a periodic reseed so drift self-heals.
+ADMIN_SEEDED_KEY = "admins:seeded"
+ADMIN_SEED_TTL = 3600  # seconds
+
+
+async def seed_admin_set(db: AsyncSession) -> None:
+    """Load admin telegram_ids from Postgres into the Redis set."""
+    result = await db.execute(
+        select(User.telegram_id).where(User.is_admin == True, User.is_active == True)
+    )
+    admin_ids = [str(tid) for tid in result.scalars().all()]
+
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(ADMIN_SET_KEY)
+            if admin_ids:
+                pipe.sadd(ADMIN_SET_KEY, *admin_ids)
+            pipe.set(ADMIN_SEEDED_KEY, "1", ex=ADMIN_SEED_TTL)
+            await pipe.execute()
+    except Exception:
+        logger.warning("Failed to seed admin set in Redis", exc_info=True)
+
+
+async def is_admin_cached(telegram_id: int) -> bool | None:
+    """Check admin status via Redis; None means the cache can't answer."""
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.sismember(ADMIN_SET_KEY, str(telegram_id))
+            pipe.exists(ADMIN_SEEDED_KEY)
+            is_member, seeded = await pipe.execute()
+    except Exception:
+        return None
+
+    if is_member:
+        return True
+    return False if seeded else None
+
+
+async def update_admin_cache(telegram_id: int, is_admin: bool) -> None:
+    """Reflect an is_admin change in the Redis set. Best-effort."""
+    try:
+        redis = await get_redis()
+        if is_admin:
+            await redis.sadd(ADMIN_SET_KEY, str(telegram_id))
+        else:
+            await redis.srem(ADMIN_SET_KEY, str(telegram_id))
+    except Exception:
+        pass  # Non-critical; the seeded-key TTL forces an eventual reseed
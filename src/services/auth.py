@@ -1,15 +1,56 @@
 import hashlib
 import secrets
 import string
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
+from src.core.redis import get_redis
 from src.db.models.user import AccessLevel, AuthCode, Session, User
+from src.services.user_cache import invalidate_user
+
+# Session store in Redis. Keyed by token hash so raw tokens never reach
+# Redis; the TTL mirrors the session's expires_at, and logout deletes
+# the key explicitly, so the hot auth path never needs the sessions
+# table. Postgres stays the durable fallback (Redis restart, eviction).
+SESSION_CACHE_PREFIX = "sess:"
+
+# Auth codes live in Redis: EXPIRE handles cleanup and GETDEL makes
+# verification single-use without an UPDATE round-trip.
+AUTH_CODE_PREFIX = "authcode:"
+
+# Settings are frozen, so the derived lifetimes can be computed once at
+# import instead of per call on the hot auth paths
+UTC = timezone.utc
+_AUTH_CODE_TTL = timedelta(minutes=settings.auth_code_expire_minutes)
+_AUTH_CODE_TTL_SECONDS = settings.auth_code_expire_minutes * 60
+_SESSION_TTL = timedelta(days=settings.session_expire_days)
+_SESSION_TTL_SECONDS = settings.session_expire_days * 86400
+
+# Hottest query in the app — precompiled once so every execution reuses
+# the same SQL text and hits the prepared-statement cache.
+_SELECT_USER_BY_TG = select(User).where(User.telegram_id == bindparam("tid"))
+
+# Short-TTL in-process memo layered above the Redis session store:
+# repeat requests within the window skip the Redis GET and the user
+# SELECT entirely. Same contract as src/services/user_cache.py — hits
+# are detached read-only rows, and staleness is bounded by the TTL.
+_SESSION_MEMO_TTL = 60.0  # seconds
+_SESSION_MEMO_MAX = 10_000
+
+_session_memo: dict[str, tuple[float, User]] = {}
+
+
+def _memo_session_user(token_hash: str, user: User) -> None:
+    if len(_session_memo) >= _SESSION_MEMO_MAX:
+        _session_memo.clear()
+    _session_memo[token_hash] = (time.monotonic(), user)
 
 
 def generate_auth_code() -> str:
@@ -30,67 +71,112 @@ def hash_token(token: str) -> str:
 
 
 class AuthService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create_auth_code(self, telegram_id: int) -> str:
-        """Create a new auth code for Telegram user."""
-        # Invalidate any existing codes
-        await self.db.execute(
-            AuthCode.__table__.update()
+        """Create a new auth code for Telegram user.
+
+        Codes are stored in Redis with a native TTL; Postgres is only
+        used as a fallback when Redis is unavailable.
+        """
+        try:
+            redis = await get_redis()
+            while True:
+                code = generate_auth_code()
+                stored = await redis.set(
+                    f"{AUTH_CODE_PREFIX}{code}",
+                    str(telegram_id),
+                    ex=_AUTH_CODE_TTL_SECONDS,
+                    nx=True,
+                )
+                if stored:  # nx=True guards against the rare code collision
+                    return code
+        except Exception:
+            pass  # Redis down — fall back to Postgres
+
+        # Invalidate existing codes and insert the new one in a single
+        # statement (data-modifying CTE): one round trip, and concurrent
+        # logins can't both leave a valid code behind
+        code = generate_auth_code()
+        invalidate_old = (
+            update(AuthCode)
             .where(AuthCode.telegram_id == telegram_id, AuthCode.used == False)
             .values(used=True)
+            .cte("invalidate_old")
         )
-
-        code = generate_auth_code()
-        auth_code = AuthCode(
-            code=code,
-            telegram_id=telegram_id,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(minutes=settings.auth_code_expire_minutes),
+        await self.db.execute(
+            AuthCode.__table__.insert()
+            .values(
+                code=code,
+                telegram_id=telegram_id,
+                expires_at=datetime.now(UTC) + _AUTH_CODE_TTL,
+            )
+            .add_cte(invalidate_old)
         )
-        self.db.add(auth_code)
         await self.db.commit()
         return code
 
-    async def verify_auth_code(
-        self, telegram_id: int, code: str
-    ) -> Optional[User]:
-        """Verify auth code and return user if valid."""
-        # Normalize code to uppercase for comparison
+    async def consume_auth_code(
+        self, code: str, telegram_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Atomically consume an auth code, returning its telegram_id.
+
+        GETDEL makes the Redis path read+invalidate in one round-trip.
+        Falls back to the auth_codes table for codes issued while Redis
+        was unavailable; the caller's commit persists the used flag.
+        """
         normalized_code = code.strip().upper()
-        result = await self.db.execute(
-            select(AuthCode).where(
-                AuthCode.telegram_id == telegram_id,
-                AuthCode.code == normalized_code,
-                AuthCode.expires_at > datetime.now(timezone.utc),
-                AuthCode.used == False,
-            )
-        )
-        auth_code = result.scalar_one_or_none()
 
-        if not auth_code:
-            return None
+        try:
+            redis = await get_redis()
+            stored = await redis.getdel(f"{AUTH_CODE_PREFIX}{normalized_code}")
+        except Exception:
+            stored = None
 
-        # Mark code as used
-        auth_code.used = True
+        if stored is not None:
+            stored_id = int(stored)
+            if telegram_id is not None and stored_id != telegram_id:
+                return None
+            return stored_id
 
-        # Get or create user
-        user = await self.get_user_by_telegram_id(telegram_id)
-        if not user:
-            user = await self.create_user(telegram_id)
+        conditions = [
+            AuthCode.code == normalized_code,
+            AuthCode.expires_at > datetime.now(UTC),
+            AuthCode.used == False,
+        ]
+        if telegram_id is not None:
+            conditions.append(AuthCode.telegram_id == telegram_id)
 
-        # Update last login
-        user.last_login = datetime.now(timezone.utc)
-        await self.db.commit()
+        # Find-and-mark-used in one atomic UPDATE ... RETURNING: no
+        # second round trip and no window for two logins to share a code
+        result = await self.db.execute(
+            update(AuthCode)
+            .where(*conditions)
+            .values(used=True)
+            .returning(AuthCode.telegram_id)
+        )
+        row = result.first()
+        return row.telegram_id if row else None
+
+    async def verify_auth_code(
+        self, telegram_id: int, code: str
+    ) -> Optional[User]:
+        """Verify auth code and return user if valid."""
+        consumed_id = await self.consume_auth_code(code, telegram_id=telegram_id)
+        if consumed_id is None:
+            return None
 
+        # Get-or-create and stamp last_login in one upsert statement;
+        # also commits the used flag from the Postgres fallback path
+        user, _ = await self.upsert_user(telegram_id, touch_login=True)
         return user
 
     async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         """Get user by Telegram ID."""
-        result = await self.db.execute(
-            select(User).where(User.telegram_id == telegram_id)
-        )
+        result = await self.db.execute(_SELECT_USER_BY_TG, {"tid": telegram_id})
         return result.scalar_one_or_none()
 
     async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
@@ -113,55 +199,162 @@ class AuthService:
         )
         self.db.add(user)
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
+    async def upsert_user(
+        self,
+        telegram_id: int,
+        username: Optional[str] = None,
+        display_name: Optional[str] = None,
+        refresh_info: bool = False,
+        touch_login: bool = False,
+    ) -> tuple[User, bool]:
+        """Get-or-create a Telegram user in a single statement.
+
+        Returns (user, created). ``xmax = 0`` on the returned row marks a
+        fresh insert, so no follow-up SELECT is needed. With
+        ``refresh_info=True`` an existing row also picks up the latest
+        username/display_name from Telegram (as /start always did);
+        ``touch_login=True`` stamps last_login, so a login is still one
+        statement.
+        """
+        values = {
+            "telegram_id": telegram_id,
+            "username": username,
+            "display_name": display_name or f"User_{telegram_id}",
+            "access_level": AccessLevel.REGISTERED,
+        }
+        if touch_login:
+            values["last_login"] = func.now()
+        stmt = pg_insert(User).values(**values)
+
+        set_ = {}
+        if refresh_info:
+            set_["username"] = func.coalesce(stmt.excluded.username, User.username)
+            set_["display_name"] = func.coalesce(
+                stmt.excluded.display_name, User.display_name
+            )
+        if touch_login:
+            set_["last_login"] = func.now()
+        if not set_:
+            # No-op assignment: DO UPDATE is still needed so RETURNING
+            # yields the existing row on conflict
+            set_ = {"telegram_id": stmt.excluded.telegram_id}
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id], set_=set_
+        ).returning(User, literal_column("(xmax = 0)").label("created"))
+
+        result = await self.db.execute(stmt)
+        row = result.first()
+        await self.db.commit()
+        invalidate_user(telegram_id)
+        return row[0], row.created
+
     async def create_session(self, user_id: UUID) -> str:
         """Create a new session and return the token."""
         token = generate_session_token()
         token_hash = hash_token(token)
 
+        expires_at = datetime.now(UTC) + _SESSION_TTL
         session = Session(
             user_id=user_id,
             token_hash=token_hash,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(days=settings.session_expire_days),
+            expires_at=expires_at,
         )
         self.db.add(session)
         await self.db.commit()
 
+        # Seed the Redis session store so even the first authenticated
+        # request skips the sessions-table query
+        try:
+            redis = await get_redis()
+            await redis.set(
+                f"{SESSION_CACHE_PREFIX}{token_hash}",
+                str(user_id),
+                ex=_SESSION_TTL_SECONDS,
+            )
+        except Exception:
+            pass  # Non-critical: first lookup warms the cache from DB
+
         return token
 
     async def get_user_by_session_token(self, token: str) -> Optional[User]:
-        """Get user by session token."""
+        """Get user by session token.
+
+        The token -> user_id mapping is cached in Redis so the hot
+        per-request auth path skips the sessions-table query.
+        """
         token_hash = hash_token(token)
+
+        memo = _session_memo.get(token_hash)
+        if memo and time.monotonic() - memo[0] < _SESSION_MEMO_TTL:
+            return memo[1]
+
+        cache_key = f"{SESSION_CACHE_PREFIX}{token_hash}"
+
+        try:
+            redis = await get_redis()
+            cached_user_id = await redis.get(cache_key)
+        except Exception:
+            redis = None  # Redis down — fall back to DB
+            cached_user_id = None
+
+        if cached_user_id:
+            user = await self.get_user_by_id(UUID(cached_user_id))
+            if user is not None:
+                _memo_session_user(token_hash, user)
+            return user
+
+        # Session and user in one JOIN instead of two sequential SELECTs
+        now = datetime.now(UTC)
         result = await self.db.execute(
-            select(Session)
+            select(User, Session.expires_at)
+            .join(Session, Session.user_id == User.id)
             .where(
                 Session.token_hash == token_hash,
-                Session.expires_at > datetime.now(timezone.utc),
+                Session.expires_at > now,
             )
+            .limit(1)
         )
-        session = result.scalar_one_or_none()
+        row = result.first()
 
-        if not session:
+        if not row:
             return None
 
-        return await self.get_user_by_id(session.user_id)
+        user = row.User
+        if redis is not None:
+            # Re-warm with the session's remaining lifetime so the Redis
+            # entry expires exactly when the session does
+            ttl = int((row.expires_at - now).total_seconds())
+            if ttl > 0:
+                try:
+                    await redis.set(cache_key, str(user.id), ex=ttl)
+                except Exception:
+                    pass  # Non-critical
+
+        _memo_session_user(token_hash, user)
+        return user
 
     async def invalidate_session(self, token: str) -> bool:
         """Invalidate a session token."""
         token_hash = hash_token(token)
+        _session_memo.pop(token_hash, None)
+
+        try:
+            redis = await get_redis()
+            await redis.delete(f"{SESSION_CACHE_PREFIX}{token_hash}")
+        except Exception:
+            pass  # Non-critical
+
+        # Single DELETE ... RETURNING instead of SELECT-then-DELETE
         result = await self.db.execute(
-            select(Session).where(Session.token_hash == token_hash)
+            delete(Session)
+            .where(Session.token_hash == token_hash)
+            .returning(Session.id)
         )
-        session = result.scalar_one_or_none()
-
-        if session:
-            await self.db.delete(session)
-            await self.db.commit()
-            return True
-        return False
+        await self.db.commit()
+        return result.first() is not None
 
     async def update_user_info(
         self,
@@ -175,5 +368,5 @@ class AuthService:
         if display_name:
             user.display_name = display_name
         await self.db.commit()
-        await self.db.refresh(user)
+        invalidate_user(user.telegram_id)
         return user
@@ -2,7 +2,7 @@ from typing import Optional
 from uuid import UUID
 
 import bleach
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -10,9 +10,26 @@ from src.db.models.comment import Comment
 
 # Constants
 MAX_COMMENT_LENGTH = 2000
+MAX_REPLY_DEPTH = 3
+
+
+def _sanitize_content(content: str) -> str:
+    """Strip all HTML from comment content.
+
+    Comments allow no markup at all, and most contain none — bleach
+    parses through html5lib, which is by far the hottest CPU step on
+    the write path, so skip it unless the text could actually hold a
+    tag or entity.
+    """
+    stripped = content.strip()
+    if "<" not in stripped and "&" not in stripped:
+        return stripped
+    return bleach.clean(stripped, tags=[], strip=True)
 
 
 class CommentService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -25,7 +42,7 @@ class CommentService:
     ) -> Comment:
         """Create a new comment."""
         # Sanitize content - no HTML allowed in comments
-        clean_content = bleach.clean(content.strip(), tags=[], strip=True)
+        clean_content = _sanitize_content(content)
 
         # Validate length
         if len(clean_content) > MAX_COMMENT_LENGTH:
@@ -44,9 +61,9 @@ class CommentService:
 
         self.db.add(comment)
         await self.db.commit()
-        await self.db.refresh(comment)
 
-        # Load author relationship
+        # Server defaults came back via INSERT ... RETURNING; only the
+        # author relationship needs a load
         await self.db.refresh(comment, ["author"])
 
         return comment
@@ -67,7 +84,7 @@ class CommentService:
             return None
 
         # Sanitize content - no HTML allowed
-        clean_content = bleach.clean(content.strip(), tags=[], strip=True)
+        clean_content = _sanitize_content(content)
 
         # Validate length
         if len(clean_content) > MAX_COMMENT_LENGTH:
@@ -78,18 +95,17 @@ class CommentService:
 
         comment.content = clean_content
         await self.db.commit()
-        await self.db.refresh(comment)
         return comment
 
     async def delete_comment(self, comment_id: UUID) -> bool:
         """Delete a comment (cascades to replies)."""
-        comment = await self.get_by_id(comment_id)
-        if not comment:
-            return False
-
-        await self.db.delete(comment)
+        # One DELETE ... RETURNING round trip; the FK's ON DELETE CASCADE
+        # removes replies without loading them
+        result = await self.db.execute(
+            delete(Comment).where(Comment.id == comment_id).returning(Comment.id)
+        )
         await self.db.commit()
-        return True
+        return result.first() is not None
 
     async def list_post_comments(
         self,
@@ -102,58 +118,66 @@ class CommentService:
         Get top-level comments for a post with authors.
         Replies are loaded via relationship.
         """
-        query = (
+        filters = [
+            Comment.post_id == post_id,
+            Comment.parent_id.is_(None),  # Only top-level
+        ]
+        if not include_unapproved:
+            filters.append(Comment.is_approved == True)
+
+        # Window-function count: page rows and the total arrive in one
+        # query instead of a separate count round trip
+        result = await self.db.execute(
+            select(Comment, func.count().over().label("total"))
+            .where(*filters)
+            .options(selectinload(Comment.author))
+            .order_by(Comment.created_at.desc())
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+        )
+        rows = result.all()
+        comments = [row.Comment for row in rows]
+        total = rows[0].total if rows else 0
+
+        # Load every reply for the post in one range scan on
+        # ix_comments_post_approved_created and assemble the tree in
+        # Python — the old per-comment recursion cost one query per node
+        replies_result = await self.db.execute(
             select(Comment)
             .where(
                 Comment.post_id == post_id,
-                Comment.parent_id.is_(None),  # Only top-level
+                Comment.parent_id.is_not(None),
+                Comment.is_approved == True,
             )
             .options(selectinload(Comment.author))
+            .order_by(Comment.created_at.asc())
         )
+        children: dict[UUID, list[Comment]] = {}
+        for reply in replies_result.scalars():
+            children.setdefault(reply.parent_id, []).append(reply)
 
-        if not include_unapproved:
-            query = query.where(Comment.is_approved == True)
-
-        # Count total
-        count_query = select(func.count()).select_from(
-            query.subquery()
-        )
-        total = (await self.db.execute(count_query)).scalar() or 0
-
-        # Get page
-        query = (
-            query.order_by(Comment.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-        )
-
-        result = await self.db.execute(query)
-        comments = list(result.scalars().all())
-
-        # Load replies for each comment
         for comment in comments:
-            await self._load_replies(comment)
+            self._attach_replies(comment, children)
 
         return comments, total
 
-    async def _load_replies(self, comment: Comment, depth: int = 0, max_depth: int = 3):
-        """Recursively load replies up to max_depth."""
-        if depth >= max_depth:
+    def _attach_replies(
+        self,
+        comment: Comment,
+        children: dict[UUID, list[Comment]],
+        depth: int = 0,
+    ) -> None:
+        """Wire prefetched replies onto a comment up to MAX_REPLY_DEPTH."""
+        if depth >= MAX_REPLY_DEPTH:
+            comment.__dict__["_replies"] = []
             return
 
-        result = await self.db.execute(
-            select(Comment)
-            .where(Comment.parent_id == comment.id, Comment.is_approved == True)
-            .options(selectinload(Comment.author))
-            .order_by(Comment.created_at.asc())
-        )
-        replies = list(result.scalars().all())
-
+        replies = children.get(comment.id, [])
         # SQLAlchemy dynamic attribute
         comment.__dict__["_replies"] = replies
 
         for reply in replies:
-            await self._load_replies(reply, depth + 1, max_depth)
+            self._attach_replies(reply, children, depth + 1)
 
     async def approve_comment(self, comment_id: UUID) -> Optional[Comment]:
         """Approve a comment."""
@@ -163,7 +187,6 @@ class CommentService:
 
         comment.is_approved = True
         await self.db.commit()
-        await self.db.refresh(comment)
         return comment
 
     async def reject_comment(self, comment_id: UUID) -> Optional[Comment]:
@@ -174,7 +197,6 @@ class CommentService:
 
         comment.is_approved = False
         await self.db.commit()
-        await self.db.refresh(comment)
         return comment
 
     async def list_pending_comments(
@@ -183,25 +205,18 @@ class CommentService:
         per_page: int = 20,
     ) -> tuple[list[Comment], int]:
         """Get unapproved comments for moderation."""
-        query = (
-            select(Comment)
+        # Same single-query window count as list_post_comments
+        result = await self.db.execute(
+            select(Comment, func.count().over().label("total"))
             .where(Comment.is_approved == False)
             .options(selectinload(Comment.author))
-        )
-
-        # Count
-        count_query = select(func.count()).select_from(query.subquery())
-        total = (await self.db.execute(count_query)).scalar() or 0
-
-        # Get page
-        query = (
-            query.order_by(Comment.created_at.desc())
+            .order_by(Comment.created_at.desc())
             .offset((page - 1) * per_page)
             .limit(per_page)
         )
-
-        result = await self.db.execute(query)
-        comments = list(result.scalars().all())
+        rows = result.all()
+        comments = [row.Comment for row in rows]
+        total = rows[0].total if rows else 0
 
         return comments, total
 
@@ -69,6 +69,8 @@ def xp_for_next_level(current_level: int) -> Optional[int]:
 
 
 class LevelService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -1,19 +1,25 @@
+import asyncio
+import logging
 import mimetypes
 import os
 import re
+import shutil
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 from uuid import UUID
 
 import aiofiles
 from fastapi import UploadFile
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, func, select, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
 from src.db.models.media import Media, MediaType
+from src.db.models.post import Post
+
+logger = logging.getLogger(__name__)
 
 
 # Allowed MIME types per media type
@@ -34,6 +40,20 @@ ALLOWED_MIME_TYPES = {
     },
 }
 
+# Chunk size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 16  # 64KB
+
+# Storage subdirs already created this process — skips a stat+mkdir
+# syscall pair per upload after warm-up. mkdir is idempotent, so a
+# racing first upload is harmless.
+_ENSURED_DIRS: set[Path] = set()
+
+
+def _ensure_dir(storage_dir: Path) -> None:
+    if storage_dir not in _ENSURED_DIRS:
+        storage_dir.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(storage_dir)
+
 # File extensions per media type
 ALLOWED_EXTENSIONS = {
     MediaType.IMAGE: {".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg"},
@@ -43,14 +63,20 @@ ALLOWED_EXTENSIONS = {
 }
 
 
+# Hoisted out of sanitize_filename: compile the character filter once
+# and fold the three replace() passes into a single translate() table
+_UNSAFE_CHARS_RE = re.compile(r"[^\w\-.]")
+_PATH_CHARS_TABLE = str.maketrans({"/": "_", "\\": "_", "\x00": None})
+
+
 def sanitize_filename(filename: str) -> str:
     """Remove potentially dangerous characters from filename."""
     # Remove path separators and null bytes
-    filename = filename.replace("/", "_").replace("\\", "_").replace("\x00", "")
+    filename = filename.translate(_PATH_CHARS_TABLE)
     # Remove leading dots (hidden files)
     filename = filename.lstrip(".")
     # Only allow safe characters
-    filename = re.sub(r"[^\w\-.]", "_", filename)
+    filename = _UNSAFE_CHARS_RE.sub("_", filename)
     # Limit length
     if len(filename) > 200:
         name, ext = os.path.splitext(filename)
@@ -58,25 +84,25 @@ def sanitize_filename(filename: str) -> str:
     return filename or "unnamed"
 
 
+# Inverted lookup tables: one hash probe instead of scanning the
+# dict-of-sets on every upload
+_MIME_TO_TYPE = {m: t for t, ms in ALLOWED_MIME_TYPES.items() for m in ms}
+_EXT_TO_TYPE = {e: t for t, es in ALLOWED_EXTENSIONS.items() for e in es}
+
+
 def get_media_type_from_mime(mime_type: str) -> Optional[MediaType]:
     """Determine MediaType from MIME type."""
-    mime_lower = mime_type.lower()
-    for media_type, allowed in ALLOWED_MIME_TYPES.items():
-        if mime_lower in allowed:
-            return media_type
-    return None
+    return _MIME_TO_TYPE.get(mime_type.lower())
 
 
 def get_media_type_from_extension(filename: str) -> Optional[MediaType]:
     """Determine MediaType from file extension."""
-    ext = os.path.splitext(filename)[1].lower()
-    for media_type, allowed in ALLOWED_EXTENSIONS.items():
-        if ext in allowed:
-            return media_type
-    return None
+    return _EXT_TO_TYPE.get(os.path.splitext(filename)[1].lower())
 
 
 class MediaService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -110,17 +136,14 @@ class MediaService:
         if ext_type and ext_type != media_type:
             raise ValueError("Расширение файла не соответствует типу содержимого")
 
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-
-        # Validate file size
+        # Validate declared size early (actual size is enforced while streaming)
         max_size = self._get_max_size(media_type)
-        if file_size > max_size:
-            raise ValueError(
-                f"Файл слишком большой. Макс. размер для {media_type.value}: "
-                f"{max_size // (1024 * 1024)}МБ"
-            )
+        size_error = ValueError(
+            f"Файл слишком большой. Макс. размер для {media_type.value}: "
+            f"{max_size // (1024 * 1024)}МБ"
+        )
+        if file.size and file.size > max_size:
+            raise size_error
 
         # Generate unique filename
         ext = os.path.splitext(original_name)[1].lower() or self._get_default_ext(media_type)
@@ -129,44 +152,63 @@ class MediaService:
         # Determine storage path
         type_dir = media_type.value + "s"  # images, audios, videos, documents
         storage_dir = settings.upload_dir / type_dir
-        storage_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(storage_dir)
 
         file_path = storage_dir / unique_filename
         relative_path = f"{type_dir}/{unique_filename}"
 
-        # Save file
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
-
-        # Create database record
-        media = Media(
-            post_id=post_id,
-            uploader_id=uploader_id,
-            media_type=media_type,
-            filename=unique_filename,
-            original_name=original_name,
-            file_path=relative_path,
-            file_size=file_size,
-            mime_type=content_type,
-        )
+        # Stream to disk in chunks so large uploads never sit in memory.
+        # buffering=0: chunks are already larger than the default 8KB
+        # buffer, so buffered IO would only add a memcpy per chunk.
+        # Any failure past this point — including the commit — removes
+        # the file, so errors can't leak orphans that fill the disk.
+        file_size = 0
+        try:
+            async with aiofiles.open(file_path, "wb", buffering=0) as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        break
+                    await f.write(chunk)
+
+            if file_size > max_size:
+                raise size_error
+
+            # Create database record
+            media = Media(
+                post_id=post_id,
+                uploader_id=uploader_id,
+                media_type=media_type,
+                filename=unique_filename,
+                original_name=original_name,
+                file_path=relative_path,
+                file_size=file_size,
+                mime_type=content_type,
+            )
 
-        self.db.add(media)
-        await self.db.commit()
-        await self.db.refresh(media)
+            self.db.add(media)
+            await self.db.commit()
+        except Exception:
+            file_path.unlink(missing_ok=True)
+            raise
 
         return media
 
     async def save_from_bytes(
         self,
-        content: bytes,
+        content: Union[bytes, memoryview],
         filename: str,
         mime_type: str,
         uploader_id: UUID,
         post_id: Optional[UUID] = None,
         telegram_file_id: Optional[str] = None,
+        telegram_unique_id: Optional[str] = None,
     ) -> Media:
         """
-        Save media from bytes (used for Telegram downloads).
+        Save media from an in-memory buffer.
+
+        Accepts any bytes-like object (e.g. ``BytesIO.getbuffer()``) so
+        callers don't have to materialize an extra copy of the blob.
         """
         original_name = sanitize_filename(filename)
         media_type = get_media_type_from_mime(mime_type)
@@ -189,17 +231,187 @@ class MediaService:
         # Storage path
         type_dir = media_type.value + "s"
         storage_dir = settings.upload_dir / type_dir
-        storage_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(storage_dir)
+
+        file_path = storage_dir / unique_filename
+        relative_path = f"{type_dir}/{unique_filename}"
+
+        # Save file (one unbuffered write — the blob is already in
+        # memory); remove it again if the DB insert fails
+        try:
+            async with aiofiles.open(file_path, "wb", buffering=0) as f:
+                await f.write(content)
+
+            # Create record
+            media = Media(
+                post_id=post_id,
+                uploader_id=uploader_id,
+                media_type=media_type,
+                filename=unique_filename,
+                original_name=original_name,
+                file_path=relative_path,
+                file_size=file_size,
+                mime_type=mime_type,
+                telegram_file_id=telegram_file_id,
+                telegram_unique_id=telegram_unique_id,
+            )
+
+            self.db.add(media)
+            await self.db.commit()
+        except Exception:
+            file_path.unlink(missing_ok=True)
+            raise
+
+        return media
+
+    async def save_from_path(
+        self,
+        src_path: Union[Path, str],
+        filename: str,
+        mime_type: str,
+        uploader_id: UUID,
+        post_id: Optional[UUID] = None,
+        telegram_file_id: Optional[str] = None,
+        telegram_unique_id: Optional[str] = None,
+        consume: bool = True,
+    ) -> Media:
+        """
+        Move an already-downloaded file into the media store.
+
+        Streaming counterpart to save_from_bytes: the content never has
+        to sit in memory. With ``consume=True`` (default) the source
+        file is moved into the store on success and deleted when
+        validation fails; with ``consume=False`` it is copied and left
+        in place so a concurrent reader can keep using it.
+        """
+        media = await self._stage_from_path(
+            src_path,
+            filename=filename,
+            mime_type=mime_type,
+            uploader_id=uploader_id,
+            post_id=post_id,
+            telegram_file_id=telegram_file_id,
+            telegram_unique_id=telegram_unique_id,
+            consume=consume,
+        )
+
+        try:
+            self.db.add(media)
+            await self.db.commit()
+        except Exception:
+            # The file was already moved into the store — don't orphan it
+            (settings.upload_dir / media.file_path).unlink(missing_ok=True)
+            raise
+
+        return media
+
+    async def save_many(
+        self,
+        items: list[tuple[Union[Path, str], str, str, Optional[str], Optional[str]]],
+        uploader_id: UUID,
+        post_id: Optional[UUID] = None,
+    ) -> list[Media]:
+        """Save several already-downloaded files in one transaction.
+
+        ``items`` holds (src_path, filename, mime_type, telegram_file_id,
+        telegram_unique_id) tuples. Files are staged concurrently, then all rows go to
+        Postgres in a single INSERT/commit instead of one commit per
+        file. Files that fail validation are logged and skipped so one
+        bad file does not sink the rest of an album.
+        """
+        if not items:
+            return []
+
+        staged = await asyncio.gather(
+            *(
+                self._stage_from_path(
+                    src_path,
+                    filename=filename,
+                    mime_type=mime_type,
+                    uploader_id=uploader_id,
+                    post_id=post_id,
+                    telegram_file_id=telegram_file_id,
+                    telegram_unique_id=telegram_unique_id,
+                )
+                for src_path, filename, mime_type, telegram_file_id, telegram_unique_id in items
+            ),
+            return_exceptions=True,
+        )
+
+        saved = []
+        for (_, filename, _, _, _), media in zip(items, staged):
+            if isinstance(media, BaseException):
+                logger.warning(f"Skipping media {filename}: {media}")
+            else:
+                saved.append(media)
+
+        if saved:
+            try:
+                self.db.add_all(saved)
+                await self.db.commit()
+            except Exception:
+                for media in saved:
+                    (settings.upload_dir / media.file_path).unlink(missing_ok=True)
+                raise
+
+        return saved
+
+    async def _stage_from_path(
+        self,
+        src_path: Union[Path, str],
+        filename: str,
+        mime_type: str,
+        uploader_id: UUID,
+        post_id: Optional[UUID] = None,
+        telegram_file_id: Optional[str] = None,
+        telegram_unique_id: Optional[str] = None,
+        consume: bool = True,
+    ) -> Media:
+        """Validate a file, move it into the store and build its Media row.
+
+        The row is not added to the session — callers decide whether to
+        commit one file (save_from_path) or a whole batch (save_many).
+        """
+        src_path = Path(src_path)
+        original_name = sanitize_filename(filename)
+        media_type = get_media_type_from_mime(mime_type)
+
+        if not media_type:
+            media_type = get_media_type_from_extension(original_name)
+
+        if not media_type:
+            if consume:
+                src_path.unlink(missing_ok=True)
+            raise ValueError(f"Неподдерживаемый тип файла: {mime_type}")
+
+        file_size = src_path.stat().st_size
+        max_size = self._get_max_size(media_type)
+        if file_size > max_size:
+            if consume:
+                src_path.unlink(missing_ok=True)
+            raise ValueError(f"Файл слишком большой для {media_type.value}")
+
+        # Generate unique filename
+        ext = os.path.splitext(original_name)[1].lower() or self._get_default_ext(media_type)
+        unique_filename = f"{uuid.uuid4()}{ext}"
+
+        # Storage path
+        type_dir = media_type.value + "s"
+        storage_dir = settings.upload_dir / type_dir
+        _ensure_dir(storage_dir)
 
         file_path = storage_dir / unique_filename
         relative_path = f"{type_dir}/{unique_filename}"
 
-        # Save file
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
+        # Rename when source and store share a filesystem, copy otherwise;
+        # either way the blocking I/O runs off the event loop
+        if consume:
+            await asyncio.to_thread(shutil.move, str(src_path), str(file_path))
+        else:
+            await asyncio.to_thread(shutil.copyfile, str(src_path), str(file_path))
 
-        # Create record
-        media = Media(
+        # Build record (ids are generated client-side, no refresh needed)
+        return Media(
             post_id=post_id,
             uploader_id=uploader_id,
             media_type=media_type,
@@ -209,58 +421,180 @@ class MediaService:
             file_size=file_size,
             mime_type=mime_type,
             telegram_file_id=telegram_file_id,
+            telegram_unique_id=telegram_unique_id,
         )
 
-        self.db.add(media)
-        await self.db.commit()
-        await self.db.refresh(media)
+    async def refresh_featured_image(self, post_id: UUID) -> None:
+        """Recompute posts.featured_image_path for one post.
 
-        return media
+        Denormalized like Post.search_vector: the cover image's path,
+        else the first attached image by sort order. A single UPDATE
+        with correlated subqueries; called after any change to a post's
+        media set, ordering or cover.
+        """
+        cover_path = (
+            select(Media.file_path)
+            .where(Media.id == Post.cover_image_id)
+            .correlate(Post)
+            .scalar_subquery()
+        )
+        first_image_path = (
+            select(Media.file_path)
+            .where(Media.post_id == Post.id, Media.media_type == MediaType.IMAGE)
+            .order_by(Media.sort_order, Media.created_at)
+            .limit(1)
+            .correlate(Post)
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(featured_image_path=func.coalesce(cover_path, first_image_path))
+        )
+        await self.db.commit()
 
     async def attach_to_post(
         self, media_id: UUID, post_id: UUID, requester_id: UUID
     ) -> Optional[Media]:
-        """Attach unattached media to a post (requires ownership)."""
-        media = await self.get_by_id(media_id)
-        if not media:
-            return None
+        """Attach unattached media to a post (requires ownership).
 
-        # Only allow owner to attach their own media
-        if media.uploader_id != requester_id:
-            return None
-
-        media.post_id = post_id
+        Ownership is enforced in the WHERE clause so the whole operation
+        is a single UPDATE ... RETURNING round-trip.
+        """
+        result = await self.db.execute(
+            update(Media)
+            .where(Media.id == media_id, Media.uploader_id == requester_id)
+            .values(post_id=post_id)
+            .returning(Media)
+        )
+        media = result.scalar_one_or_none()
         await self.db.commit()
-        await self.db.refresh(media)
+        if media is not None:
+            await self.refresh_featured_image(post_id)
         return media
 
+    async def attach_many(
+        self, post_id: UUID, requester_id: UUID, ordered: list[tuple[UUID, int]]
+    ) -> None:
+        """Attach several media rows to a post with sort orders at once.
+
+        executemany variant of attach_to_post + update_sort_order: the
+        driver ships all parameter sets in one round-trip instead of two
+        per file. Ownership is still enforced per row in the WHERE clause.
+        """
+        if not ordered:
+            return
+
+        await self.db.execute(
+            update(Media)
+            .where(Media.id == bindparam("b_id"), Media.uploader_id == requester_id)
+            .values(post_id=post_id, sort_order=bindparam("b_order")),
+            [{"b_id": media_id, "b_order": order} for media_id, order in ordered],
+        )
+        await self.db.commit()
+        await self.refresh_featured_image(post_id)
+
+    async def attach_ids(
+        self, post_id: UUID, requester_id: UUID, media_ids: list[UUID]
+    ) -> None:
+        """Attach a set of media rows to a post in one UPDATE.
+
+        Unlike attach_many this leaves sort_order untouched — used when
+        diffing an existing post's attachments, where order is managed
+        separately. Ownership is enforced in the WHERE clause.
+        """
+        if not media_ids:
+            return
+
+        await self.db.execute(
+            update(Media)
+            .where(Media.id.in_(media_ids), Media.uploader_id == requester_id)
+            .values(post_id=post_id)
+        )
+        await self.db.commit()
+        await self.refresh_featured_image(post_id)
+
+    async def detach_many(self, media_ids: list[UUID], post_id: UUID) -> None:
+        """Detach a set of media rows from a post in one UPDATE."""
+        if not media_ids:
+            return
+
+        await self.db.execute(
+            update(Media)
+            .where(Media.id.in_(media_ids), Media.post_id == post_id)
+            .values(post_id=None)
+        )
+        await self.db.commit()
+        await self.refresh_featured_image(post_id)
+
+    async def find_reusable(
+        self, telegram_unique_id: str, uploader_id: UUID
+    ) -> Optional[Media]:
+        """Find an unattached copy of a Telegram file we already stored.
+
+        file_unique_id is stable across re-uploads and forwards, so a
+        hit lets the caller skip both the Telegram download and the
+        storage write. Only rows not yet attached to a post qualify —
+        attached media belongs to its post and must not be moved.
+        """
+        result = await self.db.execute(
+            select(Media)
+            .where(
+                Media.telegram_unique_id == telegram_unique_id,
+                Media.uploader_id == uploader_id,
+                Media.post_id.is_(None),
+            )
+            .order_by(Media.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def first_image_id(self, media_ids: list[UUID]) -> Optional[UUID]:
+        """Return the id of the first image among media_ids (by sort_order)."""
+        if not media_ids:
+            return None
+
+        result = await self.db.execute(
+            select(Media.id)
+            .where(Media.id.in_(media_ids), Media.media_type == MediaType.IMAGE)
+            .order_by(Media.sort_order)
+            .limit(1)
+        )
+        return result.scalars().first()
+
     async def detach_from_post(self, media_id: UUID) -> Optional[Media]:
         """Detach media from post (but keep file)."""
         media = await self.get_by_id(media_id)
         if not media:
             return None
 
+        old_post_id = media.post_id
         media.post_id = None
         await self.db.commit()
-        await self.db.refresh(media)
+        if old_post_id is not None:
+            await self.refresh_featured_image(old_post_id)
         return media
 
     async def delete_media(self, media_id: UUID, requester_id: Optional[UUID] = None) -> bool:
         """Delete media record and file from disk."""
-        media = await self.get_by_id(media_id)
-        if not media:
+        # Only the columns the delete path needs — no full ORM row
+        result = await self.db.execute(
+            select(Media.uploader_id, Media.file_path, Media.post_id)
+            .where(Media.id == media_id)
+        )
+        row = result.first()
+        if not row:
             return False
 
         # Check ownership if requester specified
-        if requester_id and media.uploader_id != requester_id:
+        if requester_id and row.uploader_id != requester_id:
             return False
 
-        # Delete file from disk with path traversal protection
-        file_path = (settings.upload_dir / media.file_path).resolve()
-        upload_dir_resolved = settings.upload_dir.resolve()
-
-        # Ensure the file is within the upload directory
-        if not str(file_path).startswith(str(upload_dir_resolved)):
+        # Delete file from disk with path traversal protection.
+        # is_relative_to instead of a string-prefix check, which would
+        # also accept siblings like /uploads-evil next to /uploads
+        file_path = (settings.upload_dir / row.file_path).resolve()
+        if not file_path.is_relative_to(settings.upload_dir.resolve()):
             # Path traversal attempt detected
             return False
 
@@ -268,8 +602,11 @@ class MediaService:
             file_path.unlink()
 
         # Delete database record
-        await self.db.delete(media)
+        old_post_id = row.post_id
+        await self.db.execute(delete(Media).where(Media.id == media_id))
         await self.db.commit()
+        if old_post_id is not None:
+            await self.refresh_featured_image(old_post_id)
         return True
 
     async def get_by_id(self, media_id: UUID) -> Optional[Media]:
@@ -305,9 +642,32 @@ class MediaService:
 
         media.sort_order = sort_order
         await self.db.commit()
-        await self.db.refresh(media)
+        if media.post_id is not None:
+            await self.refresh_featured_image(media.post_id)
         return media
 
+    async def bulk_update_sort_order(self, media_ids: list[UUID]) -> None:
+        """Set sort_order for many media rows in a single bulk UPDATE.
+
+        The position of each id in the list becomes its sort_order.
+        """
+        if not media_ids:
+            return
+
+        await self.db.execute(
+            update(Media),
+            [{"id": media_id, "sort_order": idx} for idx, media_id in enumerate(media_ids)],
+        )
+        await self.db.commit()
+
+        result = await self.db.execute(
+            select(Media.post_id)
+            .where(Media.id.in_(media_ids), Media.post_id.is_not(None))
+            .distinct()
+        )
+        for post_id in result.scalars():
+            await self.refresh_featured_image(post_id)
+
     async def list_all_images(
         self,
         user_access_level=None,
@@ -315,24 +675,16 @@ class MediaService:
         offset: int = 0,
     ) -> list[Media]:
         """Get all images from published posts, respecting access level."""
-        from src.db.models.post import Post, PostStatus, PostVisibility
+        from src.db.models.post import Post, PostStatus
         from src.db.models.user import AccessLevel
+        from src.services.post import VISIBILITY_MAP
 
         if user_access_level is None:
             user_access_level = AccessLevel.PUBLIC
 
-        visibility_map = {
-            AccessLevel.PUBLIC: [PostVisibility.PUBLIC],
-            AccessLevel.REGISTERED: [PostVisibility.PUBLIC, PostVisibility.REGISTERED],
-            AccessLevel.PREMIUM_1: [
-                PostVisibility.PUBLIC, PostVisibility.REGISTERED, PostVisibility.PREMIUM_1,
-            ],
-            AccessLevel.PREMIUM_2: [
-                PostVisibility.PUBLIC, PostVisibility.REGISTERED,
-                PostVisibility.PREMIUM_1, PostVisibility.PREMIUM_2,
-            ],
-        }
-        allowed = visibility_map.get(user_access_level, [PostVisibility.PUBLIC])
+        allowed = VISIBILITY_MAP.get(
+            user_access_level, VISIBILITY_MAP[AccessLevel.PUBLIC]
+        )
 
         result = await self.db.execute(
             select(Media)
@@ -12,9 +12,23 @@ from src.bot.instance import bot
 from src.config import settings
 from src.db.models.post import Post, PostVisibility
 from src.db.models.user import AccessLevel, User
+from src.db.session import get_db_context
 
 logger = logging.getLogger(__name__)
 
+# Fan-out tuning for notify_new_post: enough in-flight sends to hide
+# Telegram round trips (the session-level RateLimitMiddleware keeps us
+# under the global msg/s cap), batched so gather never holds tasks for
+# the whole audience at once.
+_SEND_CONCURRENCY = 25
+_SEND_BATCH = 1000
+
+# Title suffix per visibility; levels without a badge fall back to ""
+_VISIBILITY_SUFFIX = {
+    PostVisibility.PREMIUM_1: " [Premium]",
+    PostVisibility.PREMIUM_2: " [Premium+]",
+}
+
 
 def get_required_access_level(visibility: PostVisibility) -> AccessLevel:
     """Map post visibility to minimum required access level."""
@@ -28,20 +42,29 @@ def get_required_access_level(visibility: PostVisibility) -> AccessLevel:
 
 
 class NotificationService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_users_for_notification(
+    def _notification_targets(
         self, min_access_level: AccessLevel = AccessLevel.REGISTERED
-    ) -> list[User]:
-        """Get all active users with at least the specified access level."""
-        result = await self.db.execute(
-            select(User).where(
-                User.is_active == True,
-                User.access_level >= min_access_level,
-            )
+    ):
+        """Statement selecting the telegram_ids to notify.
+
+        Only the id column: the sender never needs full User rows, and
+        at broadcast scale that's orders of magnitude fewer bytes from
+        Postgres.
+
+        Levels are matched by explicit membership: access_level is
+        stored as VARCHAR, where a >= comparison would order by text
+        collation, not by level rank.
+        """
+        eligible = [lvl for lvl in AccessLevel if lvl >= min_access_level]
+        return select(User.telegram_id).where(
+            User.is_active == True,
+            User.access_level.in_(eligible),
         )
-        return list(result.scalars().all())
 
     async def notify_new_post(self, post: Post) -> int:
         """
@@ -55,24 +78,11 @@ class NotificationService:
         if min_level == AccessLevel.PUBLIC:
             min_level = AccessLevel.REGISTERED
 
-        users = await self.get_users_for_notification(min_level)
-
-        if not users:
-            logger.info("No users to notify for post %s", post.id)
-            return 0
-
         # Build notification message
         post_url = f"{settings.base_url}/posts/{quote(post.slug, safe='')}"
 
-        visibility_emoji = {
-            PostVisibility.PUBLIC: "",
-            PostVisibility.REGISTERED: "",
-            PostVisibility.PREMIUM_1: " [Premium]",
-            PostVisibility.PREMIUM_2: " [Premium+]",
-        }
-
         message = (
-            f"<b>Новый пост в Мире Якоба!</b>{visibility_emoji.get(post.visibility, '')}\n\n"
+            f"<b>Новый пост в Мире Якоба!</b>{_VISIBILITY_SUFFIX.get(post.visibility, '')}\n\n"
             f"<b>{post.title}</b>\n\n"
         )
 
@@ -85,30 +95,49 @@ class NotificationService:
             [InlineKeyboardButton(text="Читать пост", url=post_url)]
         ])
 
-        # Send notifications
+        # Concurrent sends behind a semaphore: the old sequential loop
+        # paid RTT + 50ms per user, so wall clock grew linearly with the
+        # audience. Backpressure comes from the semaphore and the rate
+        # limit middleware, not from sleeping.
+        sem = asyncio.Semaphore(_SEND_CONCURRENCY)
+
+        async def _send(telegram_id: int) -> int:
+            async with sem:
+                try:
+                    await bot.send_message(
+                        telegram_id,
+                        message,
+                        parse_mode=ParseMode.HTML,
+                        reply_markup=keyboard,
+                    )
+                    return 1
+                except Exception as e:
+                    logger.warning(
+                        "Failed to send notification to user %s: %s",
+                        telegram_id,
+                        str(e)
+                    )
+                    return 0
+
+        # Stream ids from the server cursor batch by batch: the full
+        # audience is never materialized as ORM objects, so memory stays
+        # flat and the first sends go out before the query finishes
         success_count = 0
-        for user in users:
-            try:
-                await bot.send_message(
-                    user.telegram_id,
-                    message,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=keyboard
-                )
-                success_count += 1
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.05)
-            except Exception as e:
-                logger.warning(
-                    "Failed to send notification to user %s: %s",
-                    user.telegram_id,
-                    str(e)
-                )
+        total = 0
+        result = await self.db.stream_scalars(self._notification_targets(min_level))
+        async for batch in result.partitions(_SEND_BATCH):
+            total += len(batch)
+            results = await asyncio.gather(*(_send(tid) for tid in batch))
+            success_count += sum(results)
+
+        if not total:
+            logger.info("No users to notify for post %s", post.id)
+            return 0
 
         logger.info(
             "Sent %d/%d notifications for post %s",
             success_count,
-            len(users),
+            total,
             post.id
         )
         return success_count
@@ -121,13 +150,27 @@ async def notify_post_published(db: AsyncSession, post: Post) -> int:
 
 
 async def notify_admin_new_comment(
-    db: AsyncSession,
     comment_author_name: str,
     post_title: str,
     post_slug: str,
     comment_content: str,
+    db: Optional[AsyncSession] = None,
 ) -> bool:
-    """Notify admin about new comment."""
+    """Notify admin about new comment.
+
+    Opens its own session when none is given, so the call can run as a
+    background task after the request-scoped session has closed.
+    """
+    if db is None:
+        async with get_db_context() as db:
+            return await notify_admin_new_comment(
+                comment_author_name=comment_author_name,
+                post_title=post_title,
+                post_slug=post_slug,
+                comment_content=comment_content,
+                db=db,
+            )
+
     # Get admin users
     result = await db.execute(
         select(User).where(User.is_admin == True, User.is_active == True)
@@ -152,18 +195,27 @@ async def notify_admin_new_comment(
         [InlineKeyboardButton(text="Перейти к посту", url=post_url)]
     ])
 
-    success = False
-    for admin in admins:
-        try:
-            await bot.send_message(
+    # One pre-rendered message, all sends in flight at once over the
+    # shared connection pool; a failed recipient doesn't cancel siblings
+    results = await asyncio.gather(
+        *(
+            bot.send_message(
                 admin.telegram_id,
                 message,
                 parse_mode=ParseMode.HTML,
-                reply_markup=keyboard
+                reply_markup=keyboard,
             )
+            for admin in admins
+        ),
+        return_exceptions=True,
+    )
+
+    success = False
+    for admin, result in zip(admins, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to notify admin {admin.telegram_id}: {result}")
+        else:
             success = True
-        except Exception as e:
-            logger.warning(f"Failed to notify admin {admin.telegram_id}: {e}")
 
     return success
 
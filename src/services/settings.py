@@ -1,6 +1,8 @@
+import time
 from typing import Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models.settings import SiteSettings
@@ -13,34 +15,49 @@ DEFAULTS = {
     "avatar_path": "avatar.jpg",
 }
 
+# Site settings change rarely but are read on every page render; a
+# short per-process memo (raw DB value or None, defaults applied on
+# read) keeps the hot paths off Postgres. set() refreshes the entry,
+# so same-process writes are visible immediately; other processes
+# converge within the TTL.
+_CACHE_TTL = 60.0  # seconds
+
+_cache: dict[str, tuple[float, Optional[str]]] = {}
+
 
 class SettingsService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """Get a setting value by key."""
-        result = await self.db.execute(
-            select(SiteSettings).where(SiteSettings.key == key)
-        )
-        setting = result.scalar_one_or_none()
-        if setting:
-            return setting.value
+        now = time.monotonic()
+        entry = _cache.get(key)
+        if entry and now - entry[0] < _CACHE_TTL:
+            value = entry[1]
+        else:
+            result = await self.db.execute(
+                select(SiteSettings.value).where(SiteSettings.key == key)
+            )
+            value = result.scalar_one_or_none()
+            _cache[key] = (now, value)
+
+        if value is not None:
+            return value
         # Return from defaults if not in DB
         return DEFAULTS.get(key, default)
 
     async def set(self, key: str, value: str) -> None:
-        """Set a setting value."""
-        result = await self.db.execute(
-            select(SiteSettings).where(SiteSettings.key == key)
+        """Set a setting value (atomic upsert, one round trip)."""
+        await self.db.execute(
+            pg_insert(SiteSettings)
+            .values(key=key, value=value)
+            .on_conflict_do_update(index_elements=["key"], set_={"value": value})
         )
-        setting = result.scalar_one_or_none()
-        if setting:
-            setting.value = value
-        else:
-            setting = SiteSettings(key=key, value=value)
-            self.db.add(setting)
         await self.db.commit()
+        _cache[key] = (time.monotonic(), value)
 
     async def get_all(self) -> dict[str, str]:
         """Get all settings as a dictionary."""
@@ -53,9 +70,40 @@ class SettingsService:
         return settings
 
     async def get_hero_settings(self) -> dict[str, str]:
-        """Get hero section settings for the home page."""
+        """Get hero section settings for the home page.
+
+        Cold keys are fetched together in one IN-query instead of one
+        SELECT per key; on a warm cache this touches no database at all.
+        """
+        keys = ("hero_title", "hero_subtitle", "avatar_path")
+        now = time.monotonic()
+
+        values: dict[str, Optional[str]] = {}
+        missing = []
+        for key in keys:
+            entry = _cache.get(key)
+            if entry and now - entry[0] < _CACHE_TTL:
+                values[key] = entry[1]
+            else:
+                missing.append(key)
+
+        if missing:
+            result = await self.db.execute(
+                select(SiteSettings.key, SiteSettings.value)
+                .where(SiteSettings.key.in_(missing))
+            )
+            fetched = dict(result.all())
+            for key in missing:
+                value = fetched.get(key)
+                _cache[key] = (now, value)
+                values[key] = value
+
+        def _resolve(key: str) -> Optional[str]:
+            value = values[key]
+            return value if value is not None else DEFAULTS.get(key)
+
         return {
-            "title": await self.get("hero_title"),
-            "subtitle": await self.get("hero_subtitle"),
-            "avatar": await self.get("avatar_path"),
+            "title": _resolve("hero_title"),
+            "subtitle": _resolve("hero_subtitle"),
+            "avatar": _resolve("avatar_path"),
         }
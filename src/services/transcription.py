@@ -1,13 +1,38 @@
 """OpenAI Whisper transcription service for voice messages."""
 
+import io
 import logging
+from typing import Optional, Union
 
 import httpx
+import orjson
 
 from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP client: per-call ``async with httpx.AsyncClient()`` paid a
+# fresh TCP+TLS handshake to api.openai.com on every transcription.
+# Keep-alive connections amortize that across calls. Built lazily so
+# importing the module never opens sockets; closed in the app lifespan.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=300),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class TranscriptionService:
     """Service for transcribing audio/video using OpenAI Whisper API."""
@@ -38,7 +63,7 @@ class TranscriptionService:
 
     async def transcribe_bytes(
         self,
-        content: bytes,
+        content: Union[bytes, memoryview],
         filename: str,
         language: str = "ru",
     ) -> str:
@@ -46,7 +71,7 @@ class TranscriptionService:
         Transcribe audio/video from bytes using OpenAI Whisper API.
 
         Args:
-            content: Raw bytes of audio/video file
+            content: Raw bytes (or any bytes-like view) of audio/video file
             filename: Filename with extension (e.g., "voice.ogg", "video.mp4")
             language: Language code for better accuracy (default: "ru")
 
@@ -60,17 +85,46 @@ class TranscriptionService:
         if not settings.openai_api_key:
             raise ValueError("OpenAI API key is not configured")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        # BytesIO makes httpx chunk-stream the upload from the existing
+        # buffer instead of assembling a second multipart copy in memory
+        response = await get_client().post(
+            self.WHISPER_API_URL,
+            headers={"Authorization": f"Bearer {settings.openai_api_key}"},
+            files={"file": (filename, io.BytesIO(content))},
+            data={"model": "whisper-1", "language": language},
+            timeout=120.0,  # Voice notes can be long
+        )
+
+        response.raise_for_status()
+        return orjson.loads(response.content)["text"]
+
+    async def transcribe_file(
+        self,
+        path: str,
+        filename: str,
+        language: str = "ru",
+    ) -> str:
+        """
+        Transcribe audio/video from a file on disk.
+
+        Streaming counterpart to transcribe_bytes: httpx reads the file
+        handle in chunks while uploading, so the blob never has to be
+        loaded into memory.
+        """
+        if not settings.openai_api_key:
+            raise ValueError("OpenAI API key is not configured")
+
+        with open(path, "rb") as f:
+            response = await get_client().post(
                 self.WHISPER_API_URL,
                 headers={"Authorization": f"Bearer {settings.openai_api_key}"},
-                files={"file": (filename, content)},
+                files={"file": (filename, f)},
                 data={"model": "whisper-1", "language": language},
                 timeout=120.0,  # Voice notes can be long
             )
 
             response.raise_for_status()
-            return response.json()["text"]
+            return orjson.loads(response.content)["text"]
 
     async def format_transcription(self, raw_text: str) -> str:
         """
@@ -90,29 +144,28 @@ class TranscriptionService:
             return raw_text
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.CHAT_API_URL,
-                    headers={
-                        "Authorization": f"Bearer {settings.openai_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "gpt-4o-mini",
-                        "messages": [
-                            {"role": "system", "content": self.FORMAT_PROMPT},
-                            {"role": "user", "content": raw_text},
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 4000,
-                    },
-                    timeout=60.0,
-                )
-
-                response.raise_for_status()
-                result = response.json()
-                formatted_text = result["choices"][0]["message"]["content"]
-                return formatted_text.strip()
+            response = await get_client().post(
+                self.CHAT_API_URL,
+                headers={
+                    "Authorization": f"Bearer {settings.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": "gpt-4o-mini",
+                    "messages": [
+                        {"role": "system", "content": self.FORMAT_PROMPT},
+                        {"role": "user", "content": raw_text},
+                    ],
+                    "temperature": 0.3,
+                    "max_tokens": 4000,
+                },
+                timeout=60.0,
+            )
+
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            formatted_text = result["choices"][0]["message"]["content"]
+            return formatted_text.strip()
 
         except Exception as e:
             logger.error(f"Failed to format transcription: {e}")
@@ -1,13 +1,75 @@
+import base64
+import binascii
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
+import orjson
+from sqlalchemy import func, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from src.core.redis import get_redis
 from src.db.models.user import User, AccessLevel
+from src.services.admin_cache import update_admin_cache
+from src.services.user_cache import invalidate_user
+
+# User counters are COUNT(*) scans hit on every admin page load and on
+# each admin-mutation guard; Redis holds them for a minute and the
+# writers drop the keys, following the admin_cache best-effort pattern.
+_COUNT_TTL = 60  # seconds
+_COUNT_ADMINS_KEY = "users:count:admins"
+_COUNT_TOTAL_KEY = "users:count:total"
+_COUNT_BY_LEVEL_KEY = "users:count:by_level"
+
+
+async def _cached_count(key: str) -> Optional[bytes]:
+    """Read a cached counter; None means miss or cache unavailable."""
+    try:
+        redis = await get_redis()
+        return await redis.get(key)
+    except Exception:
+        return None
+
+
+async def _store_count(key: str, value: bytes) -> None:
+    try:
+        redis = await get_redis()
+        await redis.set(key, value, ex=_COUNT_TTL)
+    except Exception:
+        pass  # Non-critical; next read recomputes
+
+
+async def _invalidate_counts() -> None:
+    """Drop cached counters after a user mutation. Best-effort."""
+    try:
+        redis = await get_redis()
+        await redis.delete(
+            _COUNT_ADMINS_KEY, _COUNT_TOTAL_KEY, _COUNT_BY_LEVEL_KEY
+        )
+    except Exception:
+        pass
+
+
+def _encode_cursor(user: User) -> str:
+    """Opaque keyset cursor: position of the last row on the page."""
+    raw = f"{user.created_at.isoformat()}|{user.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Optional[tuple[datetime, UUID]]:
+    """Decode a cursor; malformed input means "start from the top"."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        ts, _, uid = raw.partition("|")
+        return datetime.fromisoformat(ts), UUID(uid)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
 
 
 class UserService:
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -28,11 +90,17 @@ class UserService:
 
     async def list_users(
         self,
-        page: int = 1,
+        cursor: Optional[str] = None,
         per_page: int = 20,
         search: Optional[str] = None,
-    ) -> tuple[list[User], int]:
-        """List users with pagination and optional search."""
+    ) -> tuple[list[User], Optional[str]]:
+        """List users with keyset pagination and optional search.
+
+        OFFSET pagination made Postgres scan and discard every row
+        before the requested page; the cursor turns each page into an
+        indexed range scan on (created_at, id). Returns the page and an
+        opaque cursor for the next one (None when exhausted).
+        """
         query = select(User)
 
         if search:
@@ -42,21 +110,25 @@ class UserService:
                 (User.display_name.ilike(search_pattern))
             )
 
-        # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total = (await self.db.execute(count_query)).scalar() or 0
+        if cursor:
+            position = _decode_cursor(cursor)
+            if position is not None:
+                query = query.where(
+                    tuple_(User.created_at, User.id) < position
+                )
 
-        # Get page
         query = (
-            query.order_by(User.created_at.desc())
-            .offset((page - 1) * per_page)
+            query.order_by(User.created_at.desc(), User.id.desc())
             .limit(per_page)
         )
 
         result = await self.db.execute(query)
         users = list(result.scalars().all())
 
-        return users, total
+        next_cursor = (
+            _encode_cursor(users[-1]) if len(users) == per_page else None
+        )
+        return users, next_cursor
 
     async def update_access_level(
         self,
@@ -70,68 +142,107 @@ class UserService:
 
         user.access_level = access_level
         await self.db.commit()
-        await self.db.refresh(user)
+        await _invalidate_counts()
         return user
 
-    async def count_admins(self) -> int:
-        """Count active admin users."""
+    async def count_admins(self, use_cache: bool = True) -> int:
+        """Count active admin users.
+
+        The last-admin guards pass use_cache=False: a stale count there
+        could lock the only admin out.
+        """
+        if use_cache:
+            cached = await _cached_count(_COUNT_ADMINS_KEY)
+            if cached is not None:
+                return int(cached)
+
         result = await self.db.execute(
             select(func.count())
             .select_from(User)
             .where(User.is_admin == True, User.is_active == True)
         )
-        return result.scalar() or 0
+        count = result.scalar() or 0
+        await _store_count(_COUNT_ADMINS_KEY, b"%d" % count)
+        return count
 
-    async def toggle_admin(self, user_id: UUID) -> Optional[User]:
-        """Toggle user's admin status."""
-        user = await self.get_by_id(user_id)
-        if not user:
-            return None
+    def _other_admins_exist(self, user_id: UUID):
+        """Predicate: at least one other active admin exists.
 
-        # Prevent removing the last admin
-        if user.is_admin:
-            admin_count = await self.count_admins()
-            if admin_count <= 1:
-                raise ValueError("Cannot remove the last admin")
+        Built on an alias so the subquery does not correlate with the
+        UPDATE target row.
+        """
+        other = aliased(User)
+        count = (
+            select(func.count())
+            .select_from(other)
+            .where(
+                other.is_admin == True,
+                other.is_active == True,
+                other.id != user_id,
+            )
+            .scalar_subquery()
+        )
+        return count > 0
+
+    async def _guarded_update(
+        self, user_id: UUID, guard_error: str, guard: bool = True, **values
+    ) -> Optional[User]:
+        """UPDATE ... RETURNING with the last-admin guard fused in.
+
+        The old shape was four sequential round-trips (select user,
+        count admins, update, refresh); the guard now lives in the WHERE
+        clause, so the whole mutation is one statement plus commit. No
+        row back means either the user is missing (None) or the guard
+        fired (ValueError) — disambiguated with a lookup on that cold
+        path only.
+        """
+        stmt = update(User).where(User.id == user_id)
+        if guard:
+            # Guard applies only when the target is an active admin
+            stmt = stmt.where(
+                or_(
+                    User.is_admin == False,
+                    User.is_active == False,
+                    self._other_admins_exist(user_id),
+                )
+            )
+        result = await self.db.execute(stmt.values(**values).returning(User))
+        user = result.scalar_one_or_none()
+        if user is None:
+            if await self.get_by_id(user_id) is None:
+                return None
+            raise ValueError(guard_error)
 
-        user.is_admin = not user.is_admin
         await self.db.commit()
-        await self.db.refresh(user)
+        await update_admin_cache(user.telegram_id, user.is_admin and user.is_active)
+        invalidate_user(user.telegram_id)
+        await _invalidate_counts()
         return user
 
+    async def toggle_admin(self, user_id: UUID) -> Optional[User]:
+        """Toggle user's admin status."""
+        return await self._guarded_update(
+            user_id,
+            "Cannot remove the last admin",
+            is_admin=~User.is_admin,
+        )
+
     async def set_admin(self, user_id: UUID, is_admin: bool) -> Optional[User]:
         """Set user's admin status."""
-        user = await self.get_by_id(user_id)
-        if not user:
-            return None
-
-        # Prevent removing the last admin
-        if user.is_admin and not is_admin:
-            admin_count = await self.count_admins()
-            if admin_count <= 1:
-                raise ValueError("Cannot remove the last admin")
-
-        user.is_admin = is_admin
-        await self.db.commit()
-        await self.db.refresh(user)
-        return user
+        return await self._guarded_update(
+            user_id,
+            "Cannot remove the last admin",
+            guard=not is_admin,  # Promoting never strands zero admins
+            is_admin=is_admin,
+        )
 
     async def deactivate_user(self, user_id: UUID) -> Optional[User]:
         """Deactivate a user."""
-        user = await self.get_by_id(user_id)
-        if not user:
-            return None
-
-        # Prevent deactivating the last admin
-        if user.is_admin:
-            admin_count = await self.count_admins()
-            if admin_count <= 1:
-                raise ValueError("Cannot deactivate the last admin")
-
-        user.is_active = False
-        await self.db.commit()
-        await self.db.refresh(user)
-        return user
+        return await self._guarded_update(
+            user_id,
+            "Cannot deactivate the last admin",
+            is_active=False,
+        )
 
     async def activate_user(self, user_id: UUID) -> Optional[User]:
         """Activate a user."""
@@ -141,26 +252,39 @@ class UserService:
 
         user.is_active = True
         await self.db.commit()
-        await self.db.refresh(user)
+        if user.is_admin:
+            await update_admin_cache(user.telegram_id, True)
+        invalidate_user(user.telegram_id)
+        await _invalidate_counts()
         return user
 
     async def count_users(self) -> int:
         """Get total user count."""
+        cached = await _cached_count(_COUNT_TOTAL_KEY)
+        if cached is not None:
+            return int(cached)
+
         result = await self.db.execute(
             select(func.count()).select_from(User)
         )
-        return result.scalar() or 0
+        count = result.scalar() or 0
+        await _store_count(_COUNT_TOTAL_KEY, b"%d" % count)
+        return count
 
     async def count_by_access_level(self) -> dict[str, int]:
         """Get user counts by access level."""
-        counts = {}
-        for level in AccessLevel:
-            result = await self.db.execute(
-                select(func.count())
-                .select_from(User)
-                .where(User.access_level == level)
-            )
-            counts[level.name.lower()] = result.scalar() or 0
+        cached = await _cached_count(_COUNT_BY_LEVEL_KEY)
+        if cached is not None:
+            return orjson.loads(cached)
+
+        # One GROUP BY scan instead of a COUNT query per enum member
+        result = await self.db.execute(
+            select(User.access_level, func.count()).group_by(User.access_level)
+        )
+        counts = {level.name.lower(): 0 for level in AccessLevel}
+        for level, count in result.all():
+            counts[level.name.lower()] = count
+        await _store_count(_COUNT_BY_LEVEL_KEY, orjson.dumps(counts))
         return counts
 
     async def update_display_name(
@@ -179,5 +303,5 @@ class UserService:
 
         user.display_name = new_display_name
         await self.db.commit()
-        await self.db.refresh(user)
+        invalidate_user(user.telegram_id)
         return user
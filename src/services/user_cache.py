@@ -0,0 +1,59 @@
+"""Short-TTL in-process cache for Telegram user lookups.
+
+Menu callbacks re-query the same user several times within seconds just
+to read is_admin/display_name; memoizing the row for a minute removes
+most of those SELECTs. Writers must call invalidate_user after changing
+a user so the next lookup sees fresh data.
+"""
+
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models.user import User
+
+CACHE_TTL = 60.0  # seconds
+_MAX_ENTRIES = 10_000
+
+_cache: dict[int, tuple[float, User]] = {}
+
+
+async def get_cached_user(db: AsyncSession, telegram_id: int) -> Optional[User]:
+    """Get user by Telegram ID with a short-TTL memo.
+
+    Cached hits return a User detached from any session: scalar fields
+    and already-loaded relationships are readable, but the object must
+    not be mutated or re-associated with a session.
+    """
+    now = time.monotonic()
+    entry = _cache.get(telegram_id)
+    if entry and now - entry[0] < CACHE_TTL:
+        return entry[1]
+
+    result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+    user = result.scalar_one_or_none()
+
+    if user is not None:
+        if len(_cache) >= _MAX_ENTRIES:
+            _cache.clear()
+        _cache[telegram_id] = (now, user)
+    return user
+
+
+def peek_cached_user(telegram_id: int) -> Optional[User]:
+    """Return the cached user without falling back to the database.
+
+    For callers that only want to short-circuit redundant work when a
+    fresh copy happens to be in memory.
+    """
+    entry = _cache.get(telegram_id)
+    if entry and time.monotonic() - entry[0] < CACHE_TTL:
+        return entry[1]
+    return None
+
+
+def invalidate_user(telegram_id: int) -> None:
+    """Drop a cached user after an update."""
+    _cache.pop(telegram_id, None)
@@ -0,0 +1,25 @@
+"""Shared Jinja2 environment - one instance for all routers."""
+
+import tempfile
+from pathlib import Path
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+from src.config import settings
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
+
+# Cache compiled templates on disk so cold hits skip re-parsing; only
+# watch template files for changes in debug mode.
+_bytecode_dir = Path(tempfile.gettempdir()) / "jinja_cache"
+_bytecode_dir.mkdir(exist_ok=True)
+templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache(str(_bytecode_dir))
+templates.env.auto_reload = settings.debug
+# Widen the compiled-template LRU from Jinja's default 50 slots so no
+# template is ever evicted and recompiled mid-traffic. The Environment
+# builds the cache in __init__ (cache_size can't be assigned later),
+# so swap the cache object itself.
+templates.env.cache = jinja2.utils.LRUCache(400)
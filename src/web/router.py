@@ -1,25 +1,54 @@
+import hashlib
+import json
+import re
 from pathlib import Path
 from typing import Optional
+from uuid import UUID
+
+import aiofiles
 
 from fastapi import APIRouter, Cookie, Depends, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.session import get_db
 from src.db.models.user import AccessLevel
 from src.db.models.post import PostStatus, PostType, PostVisibility
 from src.services.auth import AuthService
+from src.services.media import MediaService
 from src.services.notification import notify_post_published
 from src.services.post import PostService
 from src.services.settings import SettingsService
 from src.services.user import UserService
+from src.templating import templates
 
-templates_path = Path(__file__).parent.parent.parent / "templates"
-templates = Jinja2Templates(directory=templates_path)
 
 web_router = APIRouter()
 
+# Extracts well-formed UUIDs from the comma-separated media_ids form
+# field in one pass, replacing per-id strip + try/except UUID parsing
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+# Value→member maps for the post form enums. A miss returns None so the
+# handlers can answer 400 instead of the 500 an Enum ValueError becomes.
+_VISIBILITY = {v.value: v for v in PostVisibility}
+_STATUS = {s.value: s for s in PostStatus}
+_POST_TYPE = {t.value: t for t in PostType}
+
+
+def _post_enums(
+    visibility: str, status: str, post_type: str
+) -> tuple[PostVisibility, PostStatus, PostType]:
+    """Resolve the post form enum fields or raise 400."""
+    vis = _VISIBILITY.get(visibility)
+    st = _STATUS.get(status)
+    ptype = _POST_TYPE.get(post_type)
+    if vis is None or st is None or ptype is None:
+        raise HTTPException(status_code=400, detail="Некорректные параметры поста")
+    return vis, st, ptype
+
 
 async def get_current_user_optional(
     session: Optional[str] = Cookie(None),
@@ -32,15 +61,13 @@ async def get_current_user_optional(
     return await auth_service.get_user_by_session_token(session)
 
 
-async def require_user(
-    session: Optional[str] = Cookie(None),
-    db: AsyncSession = Depends(get_db),
-):
-    """Require authenticated user, redirect to login if not."""
-    if not session:
-        raise HTTPException(status_code=302, headers={"Location": "/login"})
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_session_token(session)
+async def require_user(user=Depends(get_current_user_optional)):
+    """Require authenticated user, redirect to login if not.
+
+    Built on get_current_user_optional so FastAPI's per-request
+    dependency cache resolves the session once even when a handler
+    depends on both.
+    """
     if not user:
         raise HTTPException(status_code=302, headers={"Location": "/login"})
     return user
@@ -67,7 +94,6 @@ async def gallery_page(
     db: AsyncSession = Depends(get_db),
 ):
     """Gallery page showing all images from all published posts."""
-    from src.services.media import MediaService
 
     if user and user.is_admin:
         access_level = AccessLevel.PREMIUM_2
@@ -92,16 +118,15 @@ async def works_page(
     db: AsyncSession = Depends(get_db),
 ):
     """Works page showing work-type posts (portfolio)."""
-    if user and user.is_admin:
-        access_level = AccessLevel.PREMIUM_2
-    else:
-        access_level = user.access_level if user else AccessLevel.PUBLIC
     post_service = PostService(db)
     posts, total = await post_service.list_posts(
-        user_access_level=access_level,
+        user_access_level=user.access_level if user else AccessLevel.PUBLIC,
+        # Admins see all content without the visibility predicate
+        skip_visibility_filter=bool(user and user.is_admin),
         page=1,
         per_page=50,
         post_type=PostType.WORK,
+        with_media=True,  # works cards render attachments
     )
     return templates.TemplateResponse(
         "pages/works.html",
@@ -162,18 +187,16 @@ async def posts_partial(
     db: AsyncSession = Depends(get_db),
 ):
     """Return posts list as HTML partial for htmx."""
-    # Admins see all content regardless of their access_level
-    if user and user.is_admin:
-        access_level = AccessLevel.PREMIUM_2
-    else:
-        access_level = user.access_level if user else AccessLevel.PUBLIC
     post_service = PostService(db)
 
     posts, total = await post_service.list_posts(
-        user_access_level=access_level,
+        user_access_level=user.access_level if user else AccessLevel.PUBLIC,
+        # Admins see all content regardless of their access_level
+        skip_visibility_filter=bool(user and user.is_admin),
         page=page,
         per_page=10,
         post_type=PostType.ARTICLE,
+        with_total=False,  # Infinite scroll only needs has_more
     )
 
     has_more = (page * 10) < total
@@ -193,13 +216,16 @@ async def posts_partial(
 
 async def require_admin(
     session: Optional[str] = Cookie(None),
-    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user_optional),
 ):
-    """Require admin user, redirect to login if not."""
+    """Require admin user, redirect to login if not.
+
+    Shares the cached get_current_user_optional lookup; the cookie is
+    read again only to keep the original no-session redirect distinct
+    from the invalid-session 403.
+    """
     if not session:
         raise HTTPException(status_code=302, headers={"Location": "/login"})
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_session_token(session)
     if not user or not user.is_admin:
         raise HTTPException(status_code=403, detail="Требуется доступ администратора")
     return user
@@ -218,20 +244,19 @@ async def admin_dashboard(
 
     # Get all posts for admin (no visibility filter)
     posts, total = await post_service.list_posts(
-        user_access_level=AccessLevel.PREMIUM_2,
+        skip_visibility_filter=True,
         include_drafts=True,
         page=1,
         per_page=20,
     )
 
-    # Calculate stats
-    published_count = sum(1 for p in posts if p.status == PostStatus.PUBLISHED)
-    draft_count = sum(1 for p in posts if p.status == PostStatus.DRAFT)
+    # Status counts over the whole table, not just the visible page
+    status_counts = await post_service.count_by_status()
 
     stats = {
         "posts": total,
-        "published": published_count,
-        "drafts": draft_count,
+        "published": status_counts.get(PostStatus.PUBLISHED, 0),
+        "drafts": status_counts.get(PostStatus.DRAFT, 0),
     }
 
     return templates.TemplateResponse(
@@ -267,9 +292,7 @@ async def admin_create_post(
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new post."""
-    from uuid import UUID
-    import json
-    from src.services.media import MediaService
+    vis, st, ptype = _post_enums(visibility, status, post_type)
 
     # Parse content_blocks JSON if provided
     blocks_data = None
@@ -286,22 +309,25 @@ async def admin_create_post(
         content_md=content_md or "",
         author_id=user.id,
         excerpt=excerpt or None,
-        visibility=PostVisibility(visibility),
-        status=PostStatus(status),
+        visibility=vis,
+        status=st,
         content_blocks=blocks_data,
-        post_type=PostType(post_type),
+        post_type=ptype,
     )
 
-    # Attach uploaded media to the post
+    # Attach uploaded media to the post in one bulk statement
     if media_ids.strip():
         media_service = MediaService(db)
-        ids = [mid.strip() for mid in media_ids.split(",") if mid.strip()]
-        for idx, mid in enumerate(ids):
+        ordered = []
+        for mid in media_ids.split(","):
+            mid = mid.strip()
+            if not mid:
+                continue
             try:
-                await media_service.attach_to_post(UUID(mid), post.id, user.id)
-                await media_service.update_sort_order(UUID(mid), idx)
-            except (ValueError, Exception):
+                ordered.append((UUID(mid), len(ordered)))
+            except ValueError:
                 pass  # Skip invalid IDs
+        await media_service.attach_many(post.id, user.id, ordered)
 
     # Send notifications if post is published
     if status == "published":
@@ -350,9 +376,7 @@ async def admin_update_post(
     db: AsyncSession = Depends(get_db),
 ):
     """Update a post."""
-    from uuid import UUID
-    import json
-    from src.services.media import MediaService
+    vis, st, ptype = _post_enums(visibility, status, post_type)
 
     # Parse content_blocks JSON if provided
     blocks_data = None
@@ -372,55 +396,43 @@ async def admin_update_post(
 
     post_service = PostService(db)
 
-    # Check if post is being published for the first time
-    old_post = await post_service.get_post_by_id(post_id)
-    was_published = old_post and old_post.status == PostStatus.PUBLISHED
-
-    post = await post_service.update_post(
+    post, old_status = await post_service.update_post(
         post_id=post_id,
         title=title,
         content_md=content_md or "",
         excerpt=excerpt or None,
-        visibility=PostVisibility(visibility),
-        status=PostStatus(status),
+        visibility=vis,
+        status=st,
         content_blocks=blocks_data,
         cover_image_id=cover_uuid,
-        post_type=PostType(post_type),
+        post_type=ptype,
     )
 
     if not post:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
     # Send notifications if post is being published for the first time
-    if status == "published" and not was_published:
+    if st == PostStatus.PUBLISHED and old_status != PostStatus.PUBLISHED:
         await notify_post_published(db, post)
 
     # Sync media attachments
     # Only process if we actually received media_ids from the form
     # (prevents accidental data loss if JS didn't run)
     media_service = MediaService(db)
-    new_ids = set(mid.strip() for mid in media_ids.split(",") if mid.strip())
+    new_ids = {UUID(m) for m in _UUID_RE.findall(media_ids.lower())}
 
     # Get current media
     current_media = await media_service.list_post_media(post.id)
-    current_ids = set(str(m.id) for m in current_media)
+    current_ids = {m.id for m in current_media}
 
-    # Attach new media
-    for mid in new_ids - current_ids:
-        try:
-            await media_service.attach_to_post(UUID(mid), post.id, user.id)
-        except (ValueError, Exception):
-            pass
+    # Attach new media in one set-wise UPDATE
+    await media_service.attach_ids(post.id, user.id, list(new_ids - current_ids))
 
     # Detach removed media - but only if we received actual media_ids
     # If new_ids is empty but current media exists, preserve it
     # (this prevents data loss when form submits before JS collects IDs)
     if new_ids or not current_ids:
-        for mid in current_ids - new_ids:
-            try:
-                await media_service.detach_from_post(UUID(mid))
-            except (ValueError, Exception):
-                pass
+        await media_service.detach_many(list(current_ids - new_ids), post.id)
 
     return RedirectResponse(
         url=f"/admin/posts/{post.id}/edit",
@@ -451,7 +463,6 @@ async def admin_toggle_pin(
     db: AsyncSession = Depends(get_db),
 ):
     """Toggle pin status of a post."""
-    from uuid import UUID
 
     try:
         uuid_id = UUID(post_id)
@@ -494,8 +505,6 @@ async def admin_save_settings(
     db: AsyncSession = Depends(get_db),
 ):
     """Save site settings."""
-    import shutil
-    from fastapi import UploadFile, File
 
     settings_service = SettingsService(db)
 
@@ -507,16 +516,29 @@ async def admin_save_settings(
     form = await request.form()
     avatar_file = form.get("avatar")
     if avatar_file and hasattr(avatar_file, "filename") and avatar_file.filename:
-        # Save avatar file
+        # Save under a content-hash name so browsers can cache the file
+        # forever — a new avatar gets a new URL instead of a stale hit
+        # on an overwritten avatar.jpg
         static_dir = Path(__file__).parent.parent.parent / "static"
-        avatar_path = static_dir / "avatar.jpg"
+        tmp_path = static_dir / "avatar.tmp"
+        hasher = hashlib.sha256()
+
+        # Stream to disk in 1MB chunks: memory stays O(chunk) instead of
+        # O(file), and the event loop is never blocked on the write
+        async with aiofiles.open(tmp_path, "wb", buffering=0) as f:
+            while chunk := await avatar_file.read(1 << 20):
+                hasher.update(chunk)
+                await f.write(chunk)
 
-        # Save uploaded file
-        content = await avatar_file.read()
-        with open(avatar_path, "wb") as f:
-            f.write(content)
+        avatar_name = f"avatar-{hasher.hexdigest()[:16]}.jpg"
+        tmp_path.replace(static_dir / avatar_name)
 
-        await settings_service.set("avatar_path", "avatar.jpg")
+        # Superseded hashed avatars are dead weight; drop them
+        for old in static_dir.glob("avatar-*.jpg"):
+            if old.name != avatar_name:
+                old.unlink(missing_ok=True)
+
+        await settings_service.set("avatar_path", avatar_name)
 
     return RedirectResponse(url="/admin/settings", status_code=302)
 
@@ -526,7 +548,7 @@ async def admin_save_settings(
 @web_router.get("/admin/users", response_class=HTMLResponse)
 async def admin_users_list(
     request: Request,
-    page: int = 1,
+    cursor: str = "",
     search: str = "",
     user=Depends(require_admin),
     db: AsyncSession = Depends(get_db),
@@ -534,13 +556,12 @@ async def admin_users_list(
     """User management page."""
     user_service = UserService(db)
 
-    users, total = await user_service.list_users(
-        page=page,
+    users, next_cursor = await user_service.list_users(
+        cursor=cursor if cursor else None,
         per_page=20,
         search=search if search else None,
     )
-
-    has_more = (page * 20) < total
+    total = await user_service.count_users()
 
     return templates.TemplateResponse(
         "admin/users.html",
@@ -549,9 +570,9 @@ async def admin_users_list(
             "user": user,
             "users": users,
             "total": total,
-            "page": page,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
             "search": search,
-            "has_more": has_more,
             "access_levels": AccessLevel,
         },
     )
@@ -598,7 +619,6 @@ async def admin_update_access_level(
     except (ValueError, KeyError):
         raise HTTPException(status_code=400, detail="Неверный уровень доступа")
 
-    from uuid import UUID
     try:
         uuid_id = UUID(user_id)
     except ValueError:
@@ -625,7 +645,6 @@ async def admin_toggle_admin(
     """Toggle user's admin status."""
     user_service = UserService(db)
 
-    from uuid import UUID
     try:
         uuid_id = UUID(user_id)
     except ValueError:
@@ -656,7 +675,6 @@ async def admin_toggle_active(
     """Toggle user's active status."""
     user_service = UserService(db)
 
-    from uuid import UUID
     try:
         uuid_id = UUID(user_id)
     except ValueError:
@@ -692,13 +710,13 @@ async def post_detail(
 ):
     """View a single post."""
     post_service = PostService(db)
-    # Admins see all content
-    if user and user.is_admin:
-        user_access = AccessLevel.PREMIUM_2
-    else:
-        user_access = user.access_level if user else AccessLevel.PUBLIC
 
-    post = await post_service.get_post_by_slug(slug, user_access_level=user_access)
+    post = await post_service.get_post_by_slug(
+        slug,
+        user_access_level=user.access_level if user else AccessLevel.PUBLIC,
+        # Admins see all content
+        skip_visibility_filter=bool(user and user.is_admin),
+    )
 
     if not post:
         # Check if the post exists but user lacks access
@@ -736,11 +754,6 @@ async def search_page(
 ):
     """Search posts page."""
     post_service = PostService(db)
-    # Admins see all content
-    if user and user.is_admin:
-        user_access = AccessLevel.PREMIUM_2
-    else:
-        user_access = user.access_level if user else AccessLevel.PUBLIC
 
     posts = []
     total = 0
@@ -749,7 +762,9 @@ async def search_page(
     if q.strip():
         posts, total = await post_service.search_posts(
             query=q,
-            user_access_level=user_access,
+            user_access_level=user.access_level if user else AccessLevel.PUBLIC,
+            # Admins see all content
+            skip_visibility_filter=bool(user and user.is_admin),
             page=page,
             per_page=10,
         )
@@ -779,11 +794,6 @@ async def search_results_partial(
 ):
     """Search results partial for htmx."""
     post_service = PostService(db)
-    # Admins see all content
-    if user and user.is_admin:
-        user_access = AccessLevel.PREMIUM_2
-    else:
-        user_access = user.access_level if user else AccessLevel.PUBLIC
 
     posts = []
     total = 0
@@ -791,7 +801,9 @@ async def search_results_partial(
     if q.strip():
         posts, total = await post_service.search_posts(
             query=q,
-            user_access_level=user_access,
+            user_access_level=user.access_level if user else AccessLevel.PUBLIC,
+            # Admins see all content
+            skip_visibility_filter=bool(user and user.is_admin),
             page=page,
             per_page=10,
         )